@@ -0,0 +1,193 @@
+"""Detecção automática dos pontos de divisão de um PDF.
+
+As páginas são renderizadas em baixa resolução e em tons de cinza, e cada
+uma é resumida por poucas medidas calculadas com NumPy: a fração da área
+coberta por tinta, o desvio padrão dos tons e uma assinatura de 16x16
+células com o tom médio de cada região. A partir delas são reconhecidas as
+páginas em branco e as folhas separadoras (páginas parecidas com uma folha
+de referência, como as de código de barras usadas na digitalização), e as
+faixas propostas são os trechos entre elas.
+
+As faixas também podem começar nas páginas apontadas pelos marcadores do
+documento ou nas páginas cujo texto atende a um padrão (ver ``text_index``).
+"""
+import fitz  # PyMuPDF
+import numpy as np
+
+from worker_pool import default_pool_size, map_shards
+
+# Largura, em pixels, da renderização usada na análise
+ANALYSIS_WIDTH = 96
+
+# Fração de cada borda ignorada no cálculo da tinta (sombras e furos da
+# digitalização costumam ficar nas margens)
+MARGIN = 0.06
+
+# Diferença mínima de tom, em relação ao fundo da página, para um pixel
+# ser considerado tinta
+INK_DELTA = 48
+
+# Lado da assinatura usada para comparar páginas
+SIGNATURE_SIZE = 16
+
+# Limites padrão para considerar uma página em branco
+BLANK_MAX_INK = 0.002
+BLANK_MAX_STD = 12.0
+
+# Correlação mínima (-1 a 1) entre a assinatura de uma página e a da folha
+# separadora de referência
+SEPARATOR_MIN_SIMILARITY = 0.85
+
+# Abaixo desta quantidade de páginas, a análise é feita no próprio processo
+PARALLEL_MIN_PAGES = 64
+
+# Quantidade de páginas enviadas de uma vez a cada processo do pool
+SHARD_SIZE = 32
+
+
+def default_analysis_workers():
+    """Número de processos usados na análise das páginas (``CORTAR_ANALYSIS_WORKERS``)."""
+    return default_pool_size("CORTAR_ANALYSIS_WORKERS")
+
+
+def render_gray(doc, index):
+    """Renderiza a página em tons de cinza com ``ANALYSIS_WIDTH`` pixels de largura.
+
+    Retorna um array ``(altura, largura)`` de ``uint8``.
+    """
+    page = doc[index]
+    scale = ANALYSIS_WIDTH / page.rect.width
+    pix = page.get_pixmap(
+        matrix=fitz.Matrix(scale, scale), colorspace=fitz.csGRAY, alpha=False
+    )
+    rows = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+    return rows[:, :pix.width]
+
+
+def page_features(gray):
+    """Calcula ``(tinta, desvio padrão, assinatura)`` de uma página em cinza."""
+    height, width = gray.shape
+    dy, dx = int(height * MARGIN), int(width * MARGIN)
+    body = gray[dy:height - dy, dx:width - dx]
+    # O fundo é o tom mais claro predominante, o que tolera papel amarelado
+    background = np.percentile(body, 90)
+    ink = np.count_nonzero(body < background - INK_DELTA) / body.size
+    std = float(body.std())
+
+    # Média de cada bloco da grade SIGNATURE_SIZE x SIGNATURE_SIZE
+    row_edges = np.linspace(0, height, SIGNATURE_SIZE + 1).astype(int)[:-1]
+    col_edges = np.linspace(0, width, SIGNATURE_SIZE + 1).astype(int)[:-1]
+    sums = np.add.reduceat(np.add.reduceat(gray.astype(np.uint32), row_edges, axis=0), col_edges, axis=1)
+    counts = np.outer(np.diff(np.append(row_edges, height)), np.diff(np.append(col_edges, width)))
+    signature = (sums / counts).astype(np.uint8).ravel()
+    return ink, std, signature
+
+
+def _analyze_range(doc, indexes):
+    """Analisa as páginas indicadas, devolvendo uma tupla por página."""
+    results = []
+    for index in indexes:
+        try:
+            ink, std, signature = page_features(render_gray(doc, index))
+        except Exception as e:
+            # Uma página ilegível não é tratada como separadora
+            print(f"Erro ao analisar a página {index+1}: {e}")
+            ink, std, signature = 1.0, 255.0, np.zeros(SIGNATURE_SIZE ** 2, np.uint8)
+        results.append((index, ink, std, signature.tobytes()))
+    return results
+
+
+class PageAnalysis:
+    """Medidas de todas as páginas de um documento, em arrays NumPy."""
+
+    def __init__(self, page_count):
+        """Cria arrays vazios para ``page_count`` páginas."""
+        self.ink = np.zeros(page_count, np.float32)
+        self.std = np.zeros(page_count, np.float32)
+        self.signatures = np.zeros((page_count, SIGNATURE_SIZE ** 2), np.uint8)
+
+    def _store(self, results):
+        """Guarda os resultados devolvidos por ``_analyze_range``."""
+        for index, ink, std, signature in results:
+            self.ink[index] = ink
+            self.std[index] = std
+            self.signatures[index] = np.frombuffer(signature, np.uint8)
+
+    def blank_pages(self, max_ink=BLANK_MAX_INK, max_std=BLANK_MAX_STD):
+        """Máscara booleana das páginas em branco."""
+        return (self.ink <= max_ink) & (self.std <= max_std)
+
+    def matching_pages(self, template, min_similarity=SEPARATOR_MIN_SIMILARITY):
+        """Máscara booleana das páginas parecidas com a página ``template``.
+
+        A semelhança é a correlação entre as assinaturas: como compara a
+        distribuição da tinta e não os tons absolutos, páginas quase brancas
+        com conteúdo em outra posição não se confundem com a referência.
+        """
+        centered = self.signatures.astype(np.float32)
+        centered -= centered.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(centered, axis=1)
+        norms[norms == 0] = np.inf  # Páginas uniformes não se parecem com nada
+        similarity = centered @ centered[template] / (norms * norms[template])
+        return similarity >= min_similarity
+
+
+def analyze_pages(document, workers=None, on_progress=None):
+    """Analisa todas as páginas de ``document`` (um ``PDFDocument``).
+
+    Documentos grandes são divididos em lotes e analisados em paralelo por
+    um pool de processos, cada um com sua própria cópia do documento.
+    ``on_progress(concluídas, total)`` é chamado a cada lote analisado.
+    Retorna um ``PageAnalysis``.
+    """
+    total = document.page_count
+    analysis = PageAnalysis(total)
+    workers = default_analysis_workers() if workers is None else max(1, workers)
+    if total < PARALLEL_MIN_PAGES:
+        workers = 1
+    shards = [range(i, min(i + SHARD_SIZE, total)) for i in range(0, total, SHARD_SIZE)]
+    done = 0
+
+    def store(results):
+        nonlocal done
+        analysis._store(results)
+        done += len(results)
+        if on_progress is not None:
+            on_progress(done, total)
+
+    map_shards(document, _analyze_range, shards, workers, store, "analyze_pages")
+    return analysis
+
+
+def ranges_between(separators):
+    """Converte a máscara de páginas separadoras em faixas [início, fim).
+
+    Cada faixa é um trecho contínuo de páginas que não são separadoras; as
+    separadoras em si não entram em nenhuma faixa.
+    """
+    content = np.concatenate(([False], ~np.asarray(separators, bool), [False]))
+    edges = np.flatnonzero(np.diff(content.astype(np.int8)))
+    return [(int(start), int(end)) for start, end in zip(edges[::2], edges[1::2])]
+
+
+def ranges_from_starts(starts, page_count):
+    """Converte as páginas iniciais de cada documento em faixas [início, fim).
+
+    Cada faixa vai de uma página inicial até a véspera da seguinte; as
+    páginas anteriores à primeira (uma capa, por exemplo) formam uma faixa
+    própria, para que nenhuma página fique de fora.
+    """
+    starts = sorted({start for start in starts if 0 <= start < page_count})
+    if not starts:
+        return []
+    if starts[0] > 0:
+        starts.insert(0, 0)
+    return list(zip(starts, starts[1:] + [page_count]))
+
+
+def outline_starts(document, max_level=1):
+    """Páginas apontadas pelos marcadores do documento até o nível ``max_level``."""
+    with document.lock:
+        toc = document.doc.get_toc(simple=True)
+    # Marcadores sem destino no documento vêm com a página -1
+    return [page - 1 for level, _, page in toc if level <= max_level and page > 0]
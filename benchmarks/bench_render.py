@@ -0,0 +1,78 @@
+"""Compara a conversão pixmap -> PIL via PNG com a leitura direta dos pixels.
+
+Uso:
+    python benchmarks/bench_render.py [--pages 1000] [--mode png|raw]
+
+Sem ``--mode``, cada modo é executado em um subprocesso separado, para que o
+pico de memória (RSS) de um não contamine a medição do outro.
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import generate_pdf, peak_rss_mb  # noqa: E402
+from renderer import pixmap_to_image  # noqa: E402
+
+
+def png_roundtrip(pix):
+    """Caminho antigo: codifica o pixmap em PNG e decodifica com o PIL."""
+    img = Image.open(io.BytesIO(pix.tobytes("png")))
+    img.load()
+    return img
+
+
+def run_mode(pdf_path, mode):
+    """Renderiza todas as páginas no modo indicado e retorna as métricas."""
+    convert = png_roundtrip if mode == "png" else pixmap_to_image
+    doc = fitz.open(pdf_path)
+    matrix = fitz.Matrix(0.5, 0.5)
+    start = time.perf_counter()
+    for page in doc:
+        pix = page.get_pixmap(matrix=matrix, alpha=False)
+        convert(pix)
+    elapsed = time.perf_counter() - start
+    pages = len(doc)
+    doc.close()
+    peak_mb = peak_rss_mb()
+    return {
+        "mode": mode,
+        "pages": pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_s": round(pages / elapsed, 1),
+        "peak_rss_mb": round(peak_mb, 1) if peak_mb is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--mode", choices=("png", "raw"))
+    parser.add_argument("--pdf", help="PDF já existente (evita gerar um novo)")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.pdf, args.mode)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "bench.pdf")
+        generate_pdf(pdf_path, args.pages, "text")
+        for mode in ("png", "raw"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--pdf", pdf_path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            print(out.strip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compara a divisão antiga (PyPDF2) com o splitter baseado em PyMuPDF.
+
+Uso:
+    python benchmarks/bench_split.py [--pages 2000] [--part-size 2] [--workers 4]
+
+O caminho antigo é medido sem o ``time.sleep(0.1)`` que ele fazia a cada
+parte; somá-lo daria mais 0,1 s por parte ao resultado do PyPDF2.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import generate_pdf  # noqa: E402
+from document import PDFDocument  # noqa: E402
+from splitter import split_pdf  # noqa: E402
+
+
+def split_pypdf2(pdf_path, ranges, output_dir):
+    """Reproduz o caminho antigo: um PdfWriter por faixa, em sequência."""
+    import PyPDF2
+
+    with open(pdf_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        for idx, (start, end) in enumerate(ranges):
+            writer = PyPDF2.PdfWriter()
+            for page_num in range(start, end):
+                writer.add_page(reader.pages[page_num])
+            with open(os.path.join(output_dir, f"Parte_{idx+1}.pdf"), "wb") as out_f:
+                writer.write(out_f)
+
+
+def measure(name, func, parts):
+    """Executa ``func`` e retorna as métricas da execução."""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": name,
+        "parts": parts,
+        "seconds": round(elapsed, 3),
+        "parts_per_s": round(parts / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--part-size", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "bench.pdf")
+        generate_pdf(pdf_path, args.pages, "text")
+        ranges = [
+            (start, min(start + args.part_size, args.pages))
+            for start in range(0, args.pages, args.part_size)
+        ]
+
+        def out_dir(name):
+            path = os.path.join(tmp, name)
+            os.makedirs(path)
+            return path
+
+        if importlib.util.find_spec("PyPDF2") is None:
+            print(json.dumps({"mode": "pypdf2", "skipped": "PyPDF2 não instalado"}))
+        else:
+            print(json.dumps(measure(
+                "pypdf2", lambda: split_pypdf2(pdf_path, ranges, out_dir("pypdf2")), len(ranges)
+            )))
+
+        document = PDFDocument(pdf_path)
+        print(json.dumps(measure(
+            "pymupdf",
+            lambda: split_pdf(document, ranges, out_dir("serial"), workers=1),
+            len(ranges),
+        )))
+        print(json.dumps(measure(
+            f"pymupdf_{args.workers}_workers",
+            lambda: split_pdf(document, ranges, out_dir("parallel"), workers=args.workers),
+            len(ranges),
+        )))
+        document.close()
+
+
+if __name__ == "__main__":
+    main()
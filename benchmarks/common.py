@@ -0,0 +1,74 @@
+"""Funções compartilhadas pelos benchmarks.
+
+Os scripts são executados diretamente (``python benchmarks/<script>.py``),
+o que coloca esta pasta no ``sys.path``; a raiz do repositório deve ser
+acrescentada a ele antes de importar este módulo.
+"""
+import io
+import random
+import sys
+
+import fitz  # PyMuPDF
+
+from profiling import current_rss
+
+# Quantidade de páginas distintas geradas para os documentos só de texto;
+# as demais são cópias delas
+TEXT_UNIT_PAGES = 50
+
+
+def generate_pdf(path, pages, kind):
+    """Gera um PDF sintético e determinístico do tipo ``kind``."""
+    rng = random.Random(pages)
+    doc = fitz.open()
+    if kind == "text":
+        unit = fitz.open()
+        for i in range(min(pages, TEXT_UNIT_PAGES)):
+            page = unit.new_page()
+            page.insert_text((72, 72), f"Documento sintético - página {i+1}", fontsize=18)
+            words = " ".join(rng.choice(("lorem", "ipsum", "dolor", "sit", "amet")) for _ in range(14))
+            for line in range(45):
+                page.insert_text((72, 100 + line * 15), words, fontsize=9)
+        while len(doc) < pages:
+            remaining = pages - len(doc)
+            doc.insert_pdf(unit, to_page=min(remaining, len(unit)) - 1)
+        unit.close()
+    else:
+        from PIL import Image
+
+        for i in range(pages):
+            # Imagem diferente em cada página, como em um documento digitalizado
+            img = Image.effect_noise((420, 560), 24 + i % 16).convert("RGB")
+            buffer = io.BytesIO()
+            img.save(buffer, format="JPEG", quality=60)
+            page = doc.new_page()
+            page.insert_image(page.rect, stream=buffer.getvalue())
+            page.insert_text((36, 36), f"Página {i+1}", fontsize=12)
+    doc.save(path)
+    doc.close()
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo em MB, ou None se indisponível.
+
+    Usa o psutil quando ele informa o pico (no Windows) e, nas demais
+    plataformas, o ``resource``; sem nenhum dos dois, o RSS atual.
+    """
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        peak = getattr(psutil.Process().memory_info(), "peak_wset", None)
+        if peak is not None:
+            return peak / 1024 / 1024
+    try:
+        import resource
+    except ImportError:
+        pass
+    else:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss é informado em bytes no macOS e em KB nos demais sistemas
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    rss = current_rss()
+    return rss / 1024 / 1024 if rss is not None else None
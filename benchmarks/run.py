@@ -0,0 +1,263 @@
+"""Suíte de benchmarks de carregamento, renderização e divisão.
+
+Uso:
+    python benchmarks/run.py [--sizes 10,500,5000,20000] [--kinds text,image]
+                             [--output resultados.json]
+
+Para cada tipo de documento (só texto ou com uma imagem por página) e cada
+tamanho, um PDF sintético e determinístico é gerado em ``--data-dir`` (e
+reaproveitado nas execuções seguintes). Cada etapa de cada caso roda em um
+subprocesso próprio, para que o pico de memória (RSS) seja o dela e não o
+da etapa mais pesada do caso.
+
+As etapas medidas correspondem ao que a aplicação faz:
+
+- ``load``: abrir o documento e contar as páginas (``_load_pdf``);
+- ``render``: renderizar os thumbnails das primeiras páginas pelo
+  ``PageRenderer`` (``_update_page_view``), incluindo o tempo até a
+  primeira página;
+- ``grid``: converter as páginas em PhotoImage e associá-las às células da
+  grade (``_bind_cell``); só é medida se houver um display disponível;
+- ``split``: gravar partes de ``--part-size`` páginas (``_generate_pdfs_thread``),
+  em um processo e com o pool padrão; ``split_optimized`` grava as mesmas
+  partes no modo otimizado, para comparar tamanho e tempo.
+
+O resultado é um JSON com o commit atual, o ambiente e, para cada etapa,
+segundos, páginas/s ou partes/s e o pico de RSS da etapa (que inclui o custo
+fixo do interpretador e das bibliotecas, igual em todas as etapas).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import fitz  # PyMuPDF
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from common import generate_pdf, peak_rss_mb  # noqa: E402
+from document import PDFDocument  # noqa: E402
+from renderer import PageRenderer  # noqa: E402
+from splitter import default_split_workers, split_pdf  # noqa: E402
+
+
+def ensure_pdf(data_dir, pages, kind):
+    """Retorna o caminho do PDF sintético, gerando-o se ainda não existir."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"{kind}_{pages}.pdf")
+    if not os.path.exists(path):
+        tmp_path = path + ".tmp"
+        generate_pdf(tmp_path, pages, kind)
+        os.replace(tmp_path, path)
+    return path
+
+
+def bench_load(pdf_path):
+    """Mede a abertura do documento e a contagem de páginas."""
+    start = time.perf_counter()
+    document = PDFDocument(pdf_path)
+    pages = document.page_count
+    elapsed = time.perf_counter() - start
+    document.close()
+    return {"stage": "load", "seconds": elapsed, "pages": pages}
+
+
+def bench_render(pdf_path, render_pages):
+    """Mede a renderização dos thumbnails das primeiras páginas."""
+    document = PDFDocument(pdf_path)
+    count = min(render_pages, document.page_count)
+    done = threading.Event()
+    first = []
+    ready = []
+
+    def on_page_ready(index, img):
+        if not first:
+            first.append(time.perf_counter())
+        ready.append(index)
+        if len(ready) == count:
+            done.set()
+
+    start = time.perf_counter()
+    renderer = PageRenderer(document, on_page_ready, workers=1)
+    renderer.request([range(count)])
+    done.wait()
+    elapsed = time.perf_counter() - start
+    renderer.close()
+    document.close()
+    return {
+        "stage": "render",
+        "seconds": elapsed,
+        "pages": count,
+        "pages_per_s": count / elapsed,
+        "first_page_s": first[0] - start,
+    }
+
+
+def bench_grid(pdf_path, render_pages):
+    """Mede a criação dos PhotoImages e sua associação às células da grade."""
+    import tkinter as tk
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return {"stage": "grid", "skipped": f"sem display: {e}"}
+    root.withdraw()
+    from PIL import ImageTk
+    from cortar import ThumbnailCell
+
+    document = PDFDocument(pdf_path)
+    count = min(render_pages, document.page_count)
+    done = threading.Event()
+    renderer = PageRenderer(
+        document, lambda i, img: done.set() if i == count - 1 else None, workers=1
+    )
+    renderer.request([range(count)])
+    done.wait()
+
+    frame = tk.Frame(root)
+    cells = [ThumbnailCell(frame, "#f5f5f5") for _ in range(30)]
+    start = time.perf_counter()
+    photos = []
+    for page in range(count):
+        cell = cells[page % len(cells)]
+        photo = ImageTk.PhotoImage(renderer.store.get(page))
+        photos.append(photo)
+        cell.image_label.config(image=photo)
+        cell.caption.config(text=f"Página {page+1}")
+        cell.frame.grid(row=(page % len(cells)) // 3, column=page % 3)
+    root.update_idletasks()
+    elapsed = time.perf_counter() - start
+    renderer.close()
+    document.close()
+    root.destroy()
+    return {"stage": "grid", "seconds": elapsed, "pages": count, "pages_per_s": count / elapsed}
+
+
+def bench_split(pdf_path, part_size, workers, stage, optimize=False):
+    """Mede a gravação das partes com a quantidade de processos indicada."""
+    document = PDFDocument(pdf_path)
+    pages = document.page_count
+    ranges = [(start, min(start + part_size, pages)) for start in range(0, pages, part_size)]
+    reports = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        split_pdf(
+            document, ranges, output_dir, workers=workers,
+            optimize=optimize, on_part_written=reports.append,
+        )
+        elapsed = time.perf_counter() - start
+    document.close()
+    return {
+        "stage": stage,
+        "seconds": elapsed,
+        "parts": len(ranges),
+        "workers": workers,
+        "parts_per_s": len(ranges) / elapsed,
+        "pages_per_s": pages / elapsed,
+        "output_mb": sum(report["bytes"] for report in reports) / 1024 / 1024,
+    }
+
+
+# Etapas de cada caso, na ordem em que são medidas
+STAGES = ("load", "render", "grid", "split", "split_optimized", "split_parallel")
+
+
+def run_stage(pdf_path, stage, args):
+    """Executa uma etapa de um caso no processo atual e retorna suas métricas.
+
+    O processo só executa essa etapa, de modo que o pico de RSS é o dela.
+    Retorna None para ``split_parallel`` se o pool padrão tiver um único
+    processo.
+    """
+    if stage == "load":
+        result = bench_load(pdf_path)
+    elif stage == "render":
+        result = bench_render(pdf_path, args.render_pages)
+    elif stage == "grid":
+        result = bench_grid(pdf_path, args.render_pages)
+    elif stage == "split":
+        result = bench_split(pdf_path, args.part_size, 1, "split")
+    elif stage == "split_optimized":
+        result = bench_split(pdf_path, args.part_size, 1, "split_optimized", optimize=True)
+    else:
+        parallel_workers = default_split_workers()
+        if parallel_workers <= 1:
+            return None
+        result = bench_split(pdf_path, args.part_size, parallel_workers, "split_parallel")
+    peak_mb = peak_rss_mb()
+    result["peak_rss_mb"] = round(peak_mb, 1) if peak_mb is not None else None
+    for key, value in result.items():
+        if isinstance(value, float):
+            result[key] = round(value, 4)
+    return result
+
+
+def git_commit():
+    """Commit atual do repositório, para comparar resultados entre versões."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,500,5000,20000")
+    parser.add_argument("--kinds", default="text,image")
+    parser.add_argument("--render-pages", type=int, default=300)
+    parser.add_argument("--part-size", type=int, default=10)
+    parser.add_argument(
+        "--data-dir", default=os.path.join(tempfile.gettempdir(), "cortar-bench"),
+        help="pasta onde os PDFs sintéticos são guardados",
+    )
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: saída padrão)")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--stage", choices=STAGES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_stage(args.case, args.stage, args)))
+        return
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pymupdf": fitz.VersionBind,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": [],
+    }
+    for kind in args.kinds.split(","):
+        for pages in (int(size) for size in args.sizes.split(",")):
+            pdf_path = ensure_pdf(args.data_dir, pages, kind)
+            for stage in STAGES:
+                out = subprocess.run(
+                    [sys.executable, __file__, "--case", pdf_path, "--stage", stage,
+                     "--render-pages", str(args.render_pages),
+                     "--part-size", str(args.part_size)],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                result = json.loads(out.strip().splitlines()[-1])
+                if result is None:
+                    continue
+                result.update(kind=kind, document_pages=pages)
+                report["results"].append(result)
+                print(json.dumps(result), file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
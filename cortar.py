@@ -1,13 +1,44 @@
 import os
+import re
 import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
-from tkinter.font import Font
-import PyPDF2
-import fitz  # PyMuPDF
+from tkinter import filedialog, messagebox, simpledialog, ttk
 from PIL import Image, ImageTk
-import io
+import functools
 import threading
-import time
+from collections import OrderedDict
+from renderer import THUMB_HEIGHT, THUMB_WIDTH, PageRenderer
+from thumbnail_cache import ThumbnailCache
+from document import PDFDocument
+from splitter import split_pdf
+from range_store import RangeOverlapError, RangeStore
+from autosplit import analyze_pages, outline_starts, ranges_between, ranges_from_starts
+from text_index import TextIndex
+from size_plan import plan_size_ranges
+from profiling import PROFILER
+
+class ThumbnailCell:
+    """Célula reutilizável da grade de thumbnails (imagem e legenda)."""
+
+    def __init__(self, parent, bg_color):
+        """Cria os widgets da célula, ainda sem página associada."""
+        self.page = None  # Índice da página exibida atualmente, ou None
+        self.frame = ttk.Frame(parent)
+        self.image_label = tk.Label(
+            self.frame, 
+            borderwidth=2, 
+            relief="solid",
+            cursor="hand2",
+            bg=bg_color
+        )
+        self.image_label.pack()
+        self.caption = ttk.Label(
+            self.frame, 
+            background="#f0f0f0",
+            relief="flat",
+            padding=(5, 2)
+        )
+        self.caption.pack(fill=tk.X)
+
 
 class PDFSplitterApp:
     """Aplicativo para dividir arquivos PDF em múltiplos documentos."""
@@ -49,14 +80,31 @@ class PDFSplitterApp:
     def setup_variables(self):
         """Inicializa as variáveis da aplicação."""
         self.pdf_path = ""
-        self.pdf_reader = None
-        self.page_images = []
-        self.ranges = []  # Lista de faixas definidas (tuplas: (página_inicial, página_final))
+        self.document = None  # PDFDocument compartilhado pela renderização e pela divisão
+        self.renderer = None  # Renderiza as páginas sob demanda
+        self._load_generation = 0  # Incrementado a cada arquivo selecionado
+        self._task_running = False  # Geração ou divisão automática em andamento
+        self.total_pages = 0
+        self.placeholder_thumbnail = None
+        try:
+            self.thumbnail_cache = ThumbnailCache()
+        except OSError as e:
+            print(f"Cache de thumbnails desativado: {e}")
+            self.thumbnail_cache = None
+        self.text_index = None  # Texto das páginas do documento atual, extraído sob demanda
+        self.text_pattern = ""  # Último padrão usado na divisão por texto
+        self.max_part_mb = 10.0  # Último limite usado na divisão por tamanho
+        self.ranges = RangeStore()  # Faixas definidas [início, fim), em ordem de página
         self.current_range_start = None  # Armazena o primeiro clique para formar a faixa
         self.last_clicked_page = None  # Armazena o índice do último PDF clicado
-        self.thumbnails = []
-        # self.labels armazenará os widgets (labels) de cada thumbnail; se um thumbnail for removido, o valor ficará como None
-        self.labels = []
+        # PhotoImages já prontos (página -> imagem), do menos ao mais recente;
+        # limitado à janela atual e às vizinhas pré-carregadas
+        self.thumbnails = OrderedDict()
+        # Conjunto fixo de células da grade, reaproveitadas a cada navegação
+        self.cells = []
+        self.page_cells = {}  # Página -> célula que a exibe no momento
+        self.current_page = 0
+        self.pages_per_view = 30
         self.status_var = tk.StringVar()
         self.status_var.set("Pronto para começar. Selecione um arquivo PDF.")
         self.output_dir = os.path.dirname(os.path.abspath(__file__))
@@ -147,6 +195,13 @@ class PDFSplitterApp:
             command=self.clear_ranges
         )
         
+        self.optimize_var = tk.BooleanVar(value=False)
+        self.chk_optimize = ttk.Checkbutton(
+            self.control_frame,
+            text="Otimizar arquivos (menores, gravação mais lenta)",
+            variable=self.optimize_var
+        )
+        
         self.btn_generate = ttk.Button(
             self.control_frame, 
             text="Gerar PDFs",
@@ -180,15 +235,46 @@ class PDFSplitterApp:
             variable=self.progress_var
         )
         
+        # Menu de ferramentas, com o registro do perfil de desempenho
+        self.menubar = tk.Menu(self.root)
+        self.tools_menu = tk.Menu(self.menubar, tearoff=0)
+        self.profile_var = tk.BooleanVar(value=PROFILER.enabled)
+        self.tools_menu.add_checkbutton(
+            label="Registrar perfil de desempenho",
+            variable=self.profile_var,
+            command=self.toggle_profiling
+        )
+        self.tools_menu.add_command(label="Exportar perfil...", command=self.export_profile)
+        self.tools_menu.add_separator()
+        first_task_item = self.tools_menu.index(tk.END) + 1
+        self.tools_menu.add_command(
+            label="Dividir nas páginas em branco",
+            command=lambda: self.auto_split("blank")
+        )
+        self.tools_menu.add_command(
+            label="Dividir nas folhas iguais à página clicada",
+            command=lambda: self.auto_split("separator")
+        )
+        self.tools_menu.add_command(label="Dividir pelos marcadores", command=self.split_by_outline)
+        self.tools_menu.add_command(label="Dividir por padrão de texto...", command=self.split_by_pattern)
+        self.tools_menu.add_command(label="Dividir por tamanho máximo...", command=self.split_by_size)
+        # Itens desativados enquanto uma tarefa em segundo plano estiver rodando
+        self.task_menu_items = range(first_task_item, self.tools_menu.index(tk.END) + 1)
+        self.menubar.add_cascade(label="Ferramentas", menu=self.tools_menu)
+        
         # Adiciona controles de navegação
         self.navigation_frame = ttk.Frame(self.display_frame)
         self.btn_prev = ttk.Button(self.navigation_frame, text="←", command=self.prev_page)
         self.btn_next = ttk.Button(self.navigation_frame, text="→", command=self.next_page)
         self.page_nav_var = tk.StringVar(value="Página 1 de 1")
         self.lbl_page_nav = ttk.Label(self.navigation_frame, textvariable=self.page_nav_var)
+        self.cache_var = tk.StringVar(value="")
+        self.lbl_cache = ttk.Label(self.navigation_frame, textvariable=self.cache_var)
         
     def setup_layout(self):
         """Organiza os widgets na interface."""
+        self.root.config(menu=self.menubar)
+        
         # Toolbar e status bar
         self.toolbar.pack(side=tk.TOP, fill=tk.X, padx=10, pady=10)
         self.title_label.pack(side=tk.LEFT, padx=10)
@@ -207,6 +293,7 @@ class PDFSplitterApp:
         self.actions_frame.pack(fill=tk.X, pady=10)
         self.btn_remove_range.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         self.btn_clear_ranges.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        self.chk_optimize.pack(anchor="w", padx=5)
         self.btn_generate.pack(fill=tk.X, pady=20, padx=5)
         
         self.pages_container.pack(fill=tk.BOTH, expand=True)
@@ -227,6 +314,7 @@ class PDFSplitterApp:
         self.btn_prev.pack(side=tk.LEFT, padx=5)
         self.lbl_page_nav.pack(side=tk.LEFT, padx=5)
         self.btn_next.pack(side=tk.LEFT, padx=5)
+        self.lbl_cache.pack(side=tk.RIGHT, padx=5)
         
     def bind_events(self):
         """Adiciona eventos de interação."""
@@ -247,124 +335,239 @@ class PDFSplitterApp:
             
     def select_pdf(self):
         """Abre um diálogo para selecionar um arquivo PDF."""
-        self.pdf_path = filedialog.askopenfilename(
+        pdf_path = filedialog.askopenfilename(
             title="Selecione o arquivo PDF", 
             filetypes=[("Arquivos PDF", "*.pdf")]
         )
-        if not self.pdf_path:
+        if not pdf_path:
             self.status_var.set("Nenhum arquivo selecionado.")
             return
 
-        self.status_var.set("Carregando PDF, por favor aguarde...")
+        self.pdf_path = pdf_path
+        # Invalida qualquer carregamento anterior ainda em andamento e
+        # interrompe a renderização do documento atual
+        self._load_generation += 1
+        if self.renderer is not None:
+            self.renderer.close()
+            self.renderer = None
+        if self.document is not None:
+            self.document.close()
+            self.document = None
+        # Sem documento aberto não há páginas para navegar até o novo
+        # carregamento terminar (ou falhar)
+        self.current_page = 0
+        self.total_pages = 0
+        self.text_index = None
         self.clear_ranges()  # Limpa dados antigos
-        threading.Thread(target=self._load_pdf, daemon=True).start()
+        self._hide_cells()
+        self.status_var.set("Carregando PDF, por favor aguarde...")
+        threading.Thread(
+            target=self._load_pdf, args=(self._load_generation, pdf_path), daemon=True
+        ).start()
             
-    def _load_pdf(self):
-        """Carrega o PDF em uma thread separada."""
+    def _load_pdf(self, generation, pdf_path):
+        """Carrega o PDF em uma thread separada.
+        
+        Nenhum estado da aplicação é alterado aqui: o resultado é entregue a
+        _finalize_pdf_loading, que o descarta se outro arquivo tiver sido
+        selecionado nesse meio tempo.
+        """
         try:
-            with open(self.pdf_path, "rb") as f:
-                pdf_data = f.read()
-            self.pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_data))
-            self.total_pages = len(self.pdf_reader.pages)
+            # O documento é aberto uma única vez e lido do disco sob demanda;
+            # o mesmo handle serve para contar, renderizar e dividir as páginas
+            with PROFILER.stage("open_document"):
+                document = PDFDocument(pdf_path)
             
-            doc = fitz.open(self.pdf_path)
-            self.page_images = []
+            # As páginas não são renderizadas aqui: o renderer rasteriza apenas
+            # as que entram na janela visível (e a pré-carga das vizinhas)
+            with PROFILER.stage("start_renderer"):
+                renderer = PageRenderer(
+                    document,
+                    functools.partial(self._on_page_rendered, generation),
+                    cache=self.thumbnail_cache
+                )
             
-            for i, page in enumerate(doc):
-                if i % 5 == 0:
-                    # Atualiza o status indicando a página atual
-                    self.root.after(0, lambda i=i: self.status_var.set(
-                        f"Carregando página {i+1} de {len(doc)}..."
-                    ))
-                try:
-                    # Para páginas a partir da 400, utiliza um fator de redução mais agressivo
-                    scale_factor = 0.3 if i >= 400 else 0.5
-                    matrix = fitz.Matrix(scale_factor, scale_factor)
-                    # Desabilita o canal alpha para reduzir uso de memória
-                    pix = page.get_pixmap(matrix=matrix, alpha=False)
-                    img_data = pix.tobytes("png")
-                    img = Image.open(io.BytesIO(img_data))
-                    self.page_images.append(img)
-                except Exception as e:
-                    print(f"Erro ao carregar a página {i+1}: {e}")
-                    # Se ocorrer um erro, cria uma imagem placeholder
-                    placeholder = Image.new("RGB", (150, 200), color="grey")
-                    self.page_images.append(placeholder)
-                    
-            self.root.after(0, self._finalize_pdf_loading)
+            self.root.after(0, lambda: self._finalize_pdf_loading(
+                generation, document, renderer
+            ))
             
         except Exception as e:
-            self.root.after(0, lambda: self.status_var.set(f"Erro: {str(e)}"))
-            self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao carregar o PDF: {e}"))
+            self.root.after(0, self._show_load_error, generation, e)
 
-    def _finalize_pdf_loading(self):
+    def _show_load_error(self, generation, error):
+        """Informa o erro de carregamento, se ele ainda for relevante."""
+        if generation != self._load_generation:
+            return
+        self.status_var.set(f"Erro: {str(error)}")
+        messagebox.showerror("Erro", f"Erro ao carregar o PDF: {error}")
+
+    def _on_page_rendered(self, generation, i, img):
+        """Chamado pela thread do renderer quando a página i fica pronta."""
+        self.root.after(0, lambda: self._show_rendered_page(generation, i, img))
+
+    def _show_rendered_page(self, generation, i, img):
+        """Guarda o PhotoImage da página i e substitui o placeholder, se visível."""
+        if generation != self._load_generation:
+            return  # Resultado de um documento que já foi fechado
+        # O PhotoImage é criado uma única vez por página, inclusive para as
+        # páginas pré-carregadas, de modo que navegar não exige nenhum
+        # processamento de imagem
+        with PROFILER.stage("photoimage", page=i):
+            tk_img = ImageTk.PhotoImage(img)
+        self._remember_thumbnail(i, tk_img)
+        cell = self.page_cells.get(i)
+        if cell is not None:
+            cell.image_label.config(image=tk_img)
+        self._update_cache_status()
+
+    def _remember_thumbnail(self, page, tk_img):
+        """Guarda o PhotoImage da página, descartando os vistos há mais tempo."""
+        self.thumbnails[page] = tk_img
+        self.thumbnails.move_to_end(page)
+        limit = 4 * self.pages_per_view
+        while len(self.thumbnails) > limit:
+            # Imagens exibidas em alguma célula nunca são descartadas
+            victim = next((p for p in self.thumbnails if p not in self.page_cells), None)
+            if victim is None:
+                break
+            del self.thumbnails[victim]
+
+    def _update_cache_status(self):
+        """Exibe os acertos e falhas do cache e a memória usada pelas páginas."""
+        parts = []
+        cache = self.thumbnail_cache
+        if cache is not None:
+            parts.append(f"Cache: {cache.hits} acertos, {cache.misses} falhas")
+        if self.renderer is not None:
+            footprint_mb = self.renderer.store.footprint / (1024 * 1024)
+            parts.append(f"Memória: {footprint_mb:.1f} MB")
+        self.cache_var.set(" · ".join(parts))
+
+    def _finalize_pdf_loading(self, generation, document, renderer):
         """Finaliza o processo de carregamento do PDF."""
+        if generation != self._load_generation:
+            # Outro arquivo foi selecionado enquanto este carregava
+            renderer.close()
+            document.close()
+            return
+        self.document = document
+        self.total_pages = document.page_count
+        self.renderer = renderer
         filename = os.path.basename(self.pdf_path)
-        self.status_var.set(f"PDF carregado: {filename} ({self.total_pages} páginas)")
         self.display_pages()
+        self._set_status_with_profile(f"PDF carregado: {filename} ({self.total_pages} páginas)")
 
     def display_pages(self):
         """Exibe as miniaturas das páginas do PDF."""
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        
-        self.thumbnails = []
-        # Inicializa self.labels com None para cada página
-        self.labels = [None] * len(self.page_images)
+        self.thumbnails = OrderedDict()
         
         self.current_page = 0
-        self.pages_per_view = 30
+        if not self.cells:
+            with PROFILER.stage("create_cells", cells=self.pages_per_view):
+                self.cells = [
+                    ThumbnailCell(self.scrollable_frame, self.bg_color)
+                    for _ in range(self.pages_per_view)
+                ]
+                for cell in self.cells:
+                    cell.image_label.bind("<Button-1>", lambda event, c=cell: self._on_cell_click(c))
         self._update_page_view()
         
-    def _create_thumbnail(self, i):
-        """Cria e exibe o thumbnail para a página de índice i."""
-        img = self.page_images[i]
-        img_copy = img.copy()
-        img_copy.thumbnail((150, 200))
-        tk_img = ImageTk.PhotoImage(img_copy)
-        if len(self.thumbnails) > i:
-            self.thumbnails[i] = tk_img
-        else:
-            self.thumbnails.append(tk_img)
-            
-        page_frame = ttk.Frame(self.scrollable_frame)
-        row = i // self.columns
-        col = i % self.columns
-        page_frame.grid(row=row, column=col, padx=10, pady=10)
-        
-        lbl = tk.Label(
-            page_frame, 
-            image=tk_img, 
-            borderwidth=2, 
-            relief="solid",
-            cursor="hand2",
-            bg=self.bg_color
-        )
-        lbl.pack()
-        lbl.bind("<Button-1>", lambda event, page=i: self.on_page_click(page))
-        self.labels[i] = lbl
-        
-        lbl_page = ttk.Label(
-            page_frame, 
-            text=f"Página {i+1}",
-            background="#f0f0f0",
-            relief="flat",
-            padding=(5, 2)
+    def _placeholder_image(self):
+        """PhotoImage exibido enquanto a página ainda não foi renderizada."""
+        if self.placeholder_thumbnail is None:
+            self.placeholder_thumbnail = ImageTk.PhotoImage(
+                Image.new("RGB", (THUMB_WIDTH, THUMB_HEIGHT), color="#dddddd")
+            )
+        return self.placeholder_thumbnail
+
+    def _bind_cell(self, cell, page, slot):
+        """Associa a célula à página e a posiciona na grade."""
+        cell.page = page
+        tk_img = self._thumbnail_for(page)
+        if tk_img is None:
+            tk_img = self._placeholder_image()
+        selected = page in (self.current_range_start, self.last_clicked_page)
+        cell.image_label.config(
+            image=tk_img,
+            bg=self.selected_color if selected else self.bg_color
         )
-        lbl_page.pack(fill=tk.X)
+        cell.caption.config(text=f"Página {page+1}")
+        cell.frame.grid(row=slot // self.columns, column=slot % self.columns, padx=10, pady=10)
+        self.page_cells[page] = cell
+
+    def _thumbnail_for(self, page):
+        """Retorna o PhotoImage da página, ou None se ela não estiver renderizada."""
+        tk_img = self.thumbnails.get(page)
+        if tk_img is not None:
+            self.thumbnails.move_to_end(page)
+            return tk_img
+        # O PhotoImage foi descartado, mas a página ainda está na memória
+        img = self.renderer.store.get(page)
+        if img is None:
+            return None
+        with PROFILER.stage("photoimage", page=page):
+            tk_img = ImageTk.PhotoImage(img)
+        self._remember_thumbnail(page, tk_img)
+        return tk_img
+
+    def _on_cell_click(self, cell):
+        """Repassa o clique na célula para a página que ela exibe."""
+        if cell.page is not None:
+            self.on_page_click(cell.page)
+
+    def _is_hidden(self, page):
+        """Indica se a página já pertence a alguma faixa."""
+        return self.ranges.owner(page) is not None
         
     def _update_page_view(self):
-        """Atualiza a visualização atual das páginas."""
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        
-        start_idx = self.current_page * self.pages_per_view
-        end_idx = min(start_idx + self.pages_per_view, len(self.page_images))
-        
-        for i in range(start_idx, end_idx):
-            self._create_thumbnail(i)
+        """Atualiza a visualização atual das páginas.
+        
+        As células existentes são apenas reassociadas às páginas da janela
+        atual; nenhum widget é criado ou destruído.
+        """
+        if self.renderer is None:
+            return  # Nenhum documento carregado (ou carregamento em andamento)
+        start_idx, end_idx = self._visible_range()
+        pages = [p for p in range(start_idx, end_idx) if not self._is_hidden(p)]
+        
+        self.page_cells = {}
+        self.renderer.store.touch(pages)
+        with PROFILER.stage("bind_cells", first_page=start_idx):
+            for slot, cell in enumerate(self.cells):
+                if slot < len(pages):
+                    self._bind_cell(cell, pages[slot], slot)
+                else:
+                    cell.page = None
+                    cell.frame.grid_remove()
             
-        self.page_nav_var.set(f"Páginas {start_idx+1}-{end_idx} de {len(self.page_images)}")
+        self.page_nav_var.set(f"Páginas {start_idx+1}-{end_idx} de {self.total_pages}")
+        self._request_renders(pages)
+
+    def _hide_cells(self):
+        """Desassocia todas as células da grade (ex.: durante um carregamento)."""
+        self.page_cells = {}
+        for cell in self.cells:
+            cell.page = None
+            cell.frame.grid_remove()
+
+    def _visible_range(self):
+        """Retorna o intervalo [início, fim) de páginas da janela atual."""
+        start_idx = self.current_page * self.pages_per_view
+        end_idx = min(start_idx + self.pages_per_view, self.total_pages)
+        return start_idx, end_idx
+
+    def _request_renders(self, visible):
+        """Pede ao renderer as páginas visíveis e pré-carrega as vizinhas.
+        
+        A prioridade segue a navegação mais provável: primeiro a janela
+        visível, depois a próxima, a anterior e, por fim, a seguinte à próxima.
+        """
+        start_idx, end_idx = self._visible_range()
+        per_view = self.pages_per_view
+        next_window = range(end_idx, end_idx + per_view)
+        prev_window = range(start_idx - 1, start_idx - per_view - 1, -1)
+        after_next = range(end_idx + per_view, end_idx + 2 * per_view)
+        self.renderer.request([visible, next_window, prev_window, after_next])
         
     def prev_page(self):
         """Navega para o conjunto anterior de páginas."""
@@ -374,26 +577,33 @@ class PDFSplitterApp:
             
     def next_page(self):
         """Navega para o próximo conjunto de páginas."""
-        if (self.current_page + 1) * self.pages_per_view < len(self.page_images):
+        if (self.current_page + 1) * self.pages_per_view < self.total_pages:
             self.current_page += 1
             self._update_page_view()
         
+    def _range_label(self, start, end):
+        """Texto da faixa na listbox, com a quantidade de páginas."""
+        num_pages = end - start
+        return f"Páginas {start+1} - {end} ({num_pages} página{'s' if num_pages > 1 else ''})"
+
     def update_range_listbox(self):
-        """Atualiza a listbox com a numeração das faixas e a quantidade de páginas em cada faixa."""
+        """Reconstrói a listbox a partir das faixas.
+        
+        A ordem das linhas é a ordem de página, que também é a numeração das
+        partes geradas. Adições e remoções isoladas atualizam apenas a linha
+        afetada; esta reconstrução completa fica para trocas em lote.
+        """
         self.listbox_ranges.delete(0, tk.END)
-        for idx, (start, end) in enumerate(self.ranges, start=1):
-            num_pages = end - start
-            entry_text = f"Faixa {idx}: Páginas {start+1} - {end} ({num_pages} página{'s' if num_pages > 1 else ''})"
-            self.listbox_ranges.insert(tk.END, entry_text)
+        for start, end in self.ranges:
+            self.listbox_ranges.insert(tk.END, self._range_label(start, end))
         
     def restore_pages(self, start, end):
-        """Recria os thumbnails das páginas do intervalo [start, end) e rola para o início."""
-        for i in range(start, end):
-            if self.labels[i] is None:
-                self._create_thumbnail(i)
-                if self.last_clicked_page == i:
-                    if self.labels[i] is not None and self.labels[i].winfo_exists():
-                        self.labels[i].config(bg=self.selected_color)
+        """Volta a exibir as páginas do intervalo [start, end) e rola para o início."""
+        # Apenas a janela atual possui células; as demais páginas são exibidas
+        # quando o usuário navegar até elas
+        view_start, view_end = self._visible_range()
+        if start < view_end and end > view_start:
+            self._update_page_view()
         self.canvas.yview_moveto(0)
                     
     def on_page_click(self, page):
@@ -402,22 +612,24 @@ class PDFSplitterApp:
         if self.current_range_start is None:
             self.current_range_start = page
             self.status_var.set(f"Página {page+1} selecionada como início. Selecione a página final.")
-            if self.labels[page] is not None and self.labels[page].winfo_exists():
-                self.labels[page].config(bg=self.selected_color)
+            cell = self.page_cells.get(page)
+            if cell is not None:
+                cell.image_label.config(bg=self.selected_color)
         else:
             start = min(self.current_range_start, page)
             end = max(self.current_range_start, page) + 1  # +1 para incluir a página final
-            self.ranges.append((start, end))
-            self.update_range_listbox()
-            self.status_var.set(f"Faixa adicionada: Páginas {start+1} - {end} ({end - start} páginas).")
-            if self.current_range_start is not None and self.labels[self.current_range_start] is not None and self.labels[self.current_range_start].winfo_exists():
-                self.labels[self.current_range_start].config(bg="SystemButtonFace")
             self.current_range_start = None
+            try:
+                position = self.ranges.add(start, end)
+            except RangeOverlapError as e:
+                self.status_var.set(f"Faixa não adicionada: {e}")
+                self._update_page_view()  # Remove o destaque da página inicial
+                return
+            self.listbox_ranges.insert(position, self._range_label(start, end))
+            self.status_var.set(f"Faixa adicionada: Páginas {start+1} - {end} ({end - start} páginas).")
 
-            for p in range(start, end):
-                if self.labels[p] is not None and self.labels[p].winfo_exists():
-                    self.labels[p].master.destroy()
-                    self.labels[p] = None
+            # As páginas da faixa deixam a grade e as restantes ocupam seu lugar
+            self._update_page_view()
             self.canvas.yview_moveto(0)
 
     def remove_range(self):
@@ -428,23 +640,19 @@ class PDFSplitterApp:
             return
         
         index = selected[0]
-        removed_range = self.ranges[index]
-        del self.ranges[index]
-        self.update_range_listbox()
+        removed_range = self.ranges.remove_at(index)
+        self.listbox_ranges.delete(index)
         self.status_var.set("Faixa removida.")
         self.restore_pages(removed_range[0], removed_range[1])
 
     def clear_ranges(self):
         """Remove todas as faixas e restaura todos os thumbnails."""
         self.listbox_ranges.delete(0, tk.END)
-        self.ranges = []
-        if self.current_range_start is not None and self.labels[self.current_range_start] is not None and self.labels[self.current_range_start].winfo_exists():
-            self.labels[self.current_range_start].config(bg="SystemButtonFace")
+        self.ranges.clear()
         self.current_range_start = None
         self.status_var.set("Todas as faixas foram removidas.")
-        for i in range(len(self.page_images)):
-            if self.labels[i] is None:
-                self._create_thumbnail(i)
+        if self.renderer is not None:
+            self._update_page_view()
         self.canvas.yview_moveto(0)
                 
     def select_output_dir(self):
@@ -462,63 +670,338 @@ class PDFSplitterApp:
             messagebox.showwarning("Aviso", "Nenhuma faixa de páginas foi definida.")
             return
 
+        # A tarefa recebe cópias do estado atual, para que selecionar outro
+        # arquivo ou editar as faixas não interfira na geração em andamento
+        self._run_document_task(
+            functools.partial(
+                self._generate_pdfs_task,
+                ranges=list(self.ranges),
+                optimize=self.optimize_var.get(),
+                output_dir=self.output_dir
+            ),
+            status="Gerando PDFs...",
+            progress_text="Gravadas {done} de {total} partes...",
+            error_text="Erro ao gerar PDFs",
+            error_status="Erro na geração dos PDFs."
+        )
+
+    def _generate_pdfs_task(self, document, on_progress, ranges, optimize, output_dir):
+        """Gera os PDFs (fora da thread da interface)."""
+        reports = []
+        with PROFILER.stage("split_pdf", parts=len(ranges), optimize=optimize):
+            # Com o diário do trabalho, gerar de novo as mesmas faixas (por
+            # exemplo, após uma interrupção) só grava as partes que faltam
+            split_pdf(
+                document, ranges, output_dir, on_progress=on_progress,
+                optimize=optimize, on_part_written=reports.append, resume=True
+            )
+        reports.sort(key=lambda report: report["part"])
+        return lambda: self._show_completion_message(reports, output_dir)
+
+    def _run_document_task(self, target, status, progress_text, error_text, error_status):
+        """Executa ``target(documento, on_progress)`` em uma thread separada.
+
+        Enquanto a tarefa roda, o documento atual fica reservado para ela (ver
+        ``PDFDocument.acquire``), a barra de progresso é exibida e os comandos
+        que iniciam outras tarefas ficam desativados. ``progress_text`` é o
+        texto da barra de status a cada avanço, com os campos ``{done}`` e
+        ``{total}``, ou None para manter ``status``. ``target`` pode retornar
+        uma função a ser chamada na thread da interface com o resultado; se
+        lançar uma exceção, ela é informada com ``error_text`` e
+        ``error_status``.
+        """
+        document = self.document
+        document.acquire()
+        self._set_tasks_enabled(False)
         self.progress.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 10))
         self.progress_var.set(0)
-        threading.Thread(target=self._generate_pdfs_thread, daemon=True).start()
-            
-    def _generate_pdfs_thread(self):
-        """Executa a geração dos PDFs em uma thread separada."""
-        self.root.after(0, lambda: self.status_var.set("Gerando PDFs..."))
-        total_ranges = len(self.ranges)
-        generated_files = []
-        original_filename = os.path.basename(self.pdf_path)
-        base, ext = os.path.splitext(original_filename)
-        
-        try:
-            with open(self.pdf_path, "rb") as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                for idx, (start, end) in enumerate(self.ranges):
-                    progress = (idx / total_ranges) * 100
-                    self.root.after(0, lambda p=progress: self.progress_var.set(p))
-                    self.root.after(0, lambda i=idx, t=total_ranges: 
-                                    self.status_var.set(f"Gerando parte {i+1} de {t}..."))
-                    writer = PyPDF2.PdfWriter()
-                    for page_num in range(start, end):
-                        writer.add_page(pdf_reader.pages[page_num])
-                    
-                    # Monta o nome de saída usando "Parte_{número}_<nome_original>.pdf"
-                    # Se o arquivo já existir, adiciona um número incremental
-                    proposed_name = f"Parte_{idx+1}_{base}{ext}"
-                    output_filename = os.path.join(self.output_dir, proposed_name)
-                    counter = 1
-                    while os.path.exists(output_filename):
-                        proposed_name = f"Parte_{idx+1}_{counter}_{base}{ext}"
-                        output_filename = os.path.join(self.output_dir, proposed_name)
-                        counter += 1
-                        
-                    with open(output_filename, "wb") as out_f:
-                        writer.write(out_f)
-                    generated_files.append(output_filename)
-                    time.sleep(0.1)
-                    
-            self.root.after(0, lambda: self.progress_var.set(100))
-            self.root.after(0, lambda: self._show_completion_message(generated_files))
-            
-        except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao gerar PDFs: {e}"))
-            self.root.after(0, lambda: self.status_var.set("Erro na geração dos PDFs."))
-            
-        self.root.after(3000, lambda: self.progress.pack_forget())
+        self.status_var.set(status)
+
+        def on_progress(done, total):
+            self.root.after(0, self._show_task_progress, done, total, progress_text)
+
+        def run():
+            try:
+                on_done = target(document, on_progress)
+            except Exception as e:
+                self.root.after(0, self._show_task_error, f"{error_text}: {e}", error_status)
+            else:
+                self.root.after(0, self.progress_var.set, 100)
+                if on_done is not None:
+                    self.root.after(0, on_done)
+            finally:
+                document.release()
+                self.root.after(0, self._finish_document_task)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _show_task_progress(self, done, total, progress_text):
+        """Atualiza a barra de progresso da tarefa em andamento."""
+        self.progress_var.set(done / total * 100)
+        if progress_text is not None:
+            self.status_var.set(progress_text.format(done=done, total=total))
+
+    def _show_task_error(self, message, status):
+        """Informa o erro de uma tarefa em segundo plano."""
+        messagebox.showerror("Erro", message)
+        self.status_var.set(status)
+
+    def _finish_document_task(self):
+        """Reativa os comandos e oculta a barra de progresso pouco depois."""
+        self._set_tasks_enabled(True)
+        self.root.after(3000, self._hide_progress)
+
+    def _hide_progress(self):
+        """Oculta a barra de progresso, se nenhuma outra tarefa a estiver usando."""
+        if not self._task_running:
+            self.progress.pack_forget()
+
+    def _set_tasks_enabled(self, enabled):
+        """Ativa ou desativa "Gerar PDFs" e os itens de divisão automática.
+
+        Duas tarefas ao mesmo tempo disputariam a barra de progresso e, no
+        caso de duas gerações, os mesmos arquivos de saída.
+        """
+        self._task_running = not enabled
+        state = tk.NORMAL if enabled else tk.DISABLED
+        self.btn_generate.config(state=state)
+        for index in self.task_menu_items:
+            self.tools_menu.entryconfig(index, state=state)
     
-    def _show_completion_message(self, files):
-        """Mostra mensagem de conclusão."""
-        self.status_var.set(f"{len(files)} PDFs gerados com sucesso.")
+    def _show_completion_message(self, reports, output_dir):
+        """Mostra mensagem de conclusão, com o tamanho e o tempo de cada parte."""
+        total_mb = sum(report["bytes"] for report in reports) / 1024 / 1024
+        total_seconds = sum(report["seconds"] for report in reports)
+        skipped = sum(1 for report in reports if report["skipped"])
+        skipped_text = f", {skipped} já existentes" if skipped else ""
+        self._set_status_with_profile(
+            f"{len(reports)} PDFs gerados com sucesso ({total_mb:.1f} MB, "
+            f"{total_seconds:.2f} s de gravação{skipped_text})."
+        )
         message = "PDFs gerados com sucesso:\n\n"
-        for file in files:
-            message += f"• {os.path.basename(file)}\n"
-        message += f"\nSalvos em: {self.output_dir}"
+        for report in reports:
+            detail = "já existente" if report["skipped"] else f"{report['seconds']:.2f} s"
+            if report["baseline_bytes"]:
+                saved = 1 - report["bytes"] / report["baseline_bytes"]
+                detail = f"{saved:.0%} menor, {detail}"
+            message += (
+                f"• {os.path.basename(report['path'])} "
+                f"({report['bytes'] / 1024:.0f} KB, {detail})\n"
+            )
+        if reports and reports[0]["optimized"]:
+            compared = [report for report in reports if report["baseline_bytes"]]
+            baseline = sum(report["baseline_bytes"] for report in compared)
+            if baseline:
+                saved = baseline - sum(report["bytes"] for report in compared)
+                message += (
+                    f"\nArquivos otimizados: {saved / 1024 / 1024:.1f} MB "
+                    f"({saved / baseline:.0%}) a menos que o estimado sem otimização."
+                )
+            else:
+                message += "\nArquivos otimizados."
+        message += f"\nTotal: {total_mb:.1f} MB\nSalvos em: {output_dir}"
         messagebox.showinfo("Processamento Concluído", message)
 
+    def auto_split(self, mode):
+        """Propõe faixas a partir das páginas separadoras do documento.
+        
+        ``mode`` é ``"blank"`` (páginas em branco) ou ``"separator"`` (folhas
+        parecidas com a última página clicada). As faixas propostas
+        substituem as atuais e podem ser revisadas antes de gerar os PDFs.
+        """
+        if self.document is None:
+            messagebox.showwarning("Aviso", "Selecione um arquivo PDF primeiro.")
+            return
+        template = None
+        if mode == "separator":
+            if self.last_clicked_page is None:
+                messagebox.showwarning("Aviso", "Clique em uma folha separadora para usá-la como referência.")
+                return
+            template = self.last_clicked_page
+        if not self._confirm_replace_ranges():
+            return
+
+        self._run_document_task(
+            functools.partial(
+                self._auto_split_task, generation=self._load_generation, template=template
+            ),
+            status="Analisando páginas...",
+            progress_text="Analisadas {done} de {total} páginas...",
+            error_text="Erro ao analisar as páginas",
+            error_status="Erro na divisão automática."
+        )
+
+    def _auto_split_task(self, document, on_progress, generation, template):
+        """Analisa as páginas (fora da thread da interface) e propõe as faixas."""
+        with PROFILER.stage("auto_split", pages=document.page_count):
+            analysis = analyze_pages(document, on_progress=on_progress)
+            if template is None:
+                separators = analysis.blank_pages()
+            else:
+                separators = analysis.matching_pages(template)
+            ranges = ranges_between(separators)
+        summary = f"{len(ranges)} faixas propostas a partir de {int(separators.sum())} páginas separadoras."
+        return lambda: self._apply_auto_split(generation, ranges, summary)
+
+    def split_by_outline(self):
+        """Propõe uma faixa para cada marcador de primeiro nível do documento."""
+        if self.document is None:
+            messagebox.showwarning("Aviso", "Selecione um arquivo PDF primeiro.")
+            return
+        starts = outline_starts(self.document)
+        if not starts:
+            messagebox.showinfo("Divisão pelos marcadores", "O documento não possui marcadores.")
+            return
+        if not self._confirm_replace_ranges():
+            return
+        ranges = ranges_from_starts(starts, self.total_pages)
+        self._apply_auto_split(
+            self._load_generation, ranges,
+            f"{len(ranges)} faixas propostas a partir de {len(starts)} marcadores."
+        )
+
+    def split_by_pattern(self):
+        """Propõe faixas que começam nas páginas cujo texto atende a um padrão.
+        
+        O texto do documento é extraído uma única vez (ou lido do cache em
+        disco); testar outros padrões no mesmo arquivo é imediato.
+        """
+        if self.document is None:
+            messagebox.showwarning("Aviso", "Selecione um arquivo PDF primeiro.")
+            return
+        pattern = simpledialog.askstring(
+            "Dividir por padrão de texto",
+            "Expressão regular presente na primeira página de cada documento\n"
+            "(ex.: Nota Fiscal N[ºo] \\d+):",
+            initialvalue=self.text_pattern,
+            parent=self.root
+        )
+        if not pattern:
+            return
+        try:
+            regex = re.compile(pattern, re.MULTILINE)
+        except re.error as e:
+            messagebox.showerror("Erro", f"Expressão regular inválida: {e}")
+            return
+        self.text_pattern = pattern
+        if not self._confirm_replace_ranges():
+            return
+
+        if self.text_index is not None:
+            self._apply_pattern_split(self._load_generation, self.text_index, regex)
+            return
+        self._run_document_task(
+            functools.partial(
+                self._text_index_task, generation=self._load_generation, regex=regex
+            ),
+            status="Extraindo o texto das páginas...",
+            progress_text="Texto extraído de {done} de {total} páginas...",
+            error_text="Erro ao extrair o texto",
+            error_status="Erro na divisão por padrão de texto."
+        )
+
+    def _text_index_task(self, document, on_progress, generation, regex):
+        """Obtém o texto das páginas (fora da thread da interface)."""
+        index = TextIndex.load(document, on_progress=on_progress)
+        return lambda: self._apply_pattern_split(generation, index, regex)
+
+    def _apply_pattern_split(self, generation, index, regex):
+        """Busca o padrão no índice de texto e propõe as faixas."""
+        if generation != self._load_generation:
+            return
+        self.text_index = index
+        starts = index.matching_pages(regex)
+        if not starts:
+            self.status_var.set(f"Nenhuma página contém o padrão \"{regex.pattern}\".")
+            return
+        ranges = ranges_from_starts(starts, self.total_pages)
+        self._apply_auto_split(
+            generation, ranges,
+            f"{len(ranges)} faixas propostas a partir de {len(starts)} páginas com o padrão."
+        )
+
+    def split_by_size(self):
+        """Propõe partes consecutivas que não ultrapassem um tamanho máximo."""
+        if self.document is None:
+            messagebox.showwarning("Aviso", "Selecione um arquivo PDF primeiro.")
+            return
+        max_mb = simpledialog.askfloat(
+            "Dividir por tamanho máximo",
+            "Tamanho máximo de cada parte (MB):",
+            initialvalue=self.max_part_mb,
+            minvalue=0.01,
+            parent=self.root
+        )
+        if max_mb is None or not self._confirm_replace_ranges():
+            return
+        self.max_part_mb = max_mb
+
+        self._run_document_task(
+            functools.partial(
+                self._size_split_task, generation=self._load_generation, max_mb=max_mb
+            ),
+            status="Estimando o tamanho das páginas...",
+            progress_text=None,
+            error_text="Erro ao estimar o tamanho das páginas",
+            error_status="Erro na divisão por tamanho."
+        )
+
+    def _size_split_task(self, document, on_progress, generation, max_mb):
+        """Estima o tamanho das páginas (fora da thread da interface) e propõe as partes."""
+        ranges = plan_size_ranges(document, int(max_mb * 1024 * 1024), on_progress=on_progress)
+        summary = f"{len(ranges)} partes propostas com até {max_mb:g} MB cada."
+        return lambda: self._apply_auto_split(generation, ranges, summary)
+
+    def _confirm_replace_ranges(self):
+        """Pede confirmação antes de substituir as faixas já definidas."""
+        return not self.ranges or messagebox.askyesno(
+            "Divisão automática", "As faixas atuais serão substituídas. Deseja continuar?"
+        )
+
+    def _apply_auto_split(self, generation, ranges, summary):
+        """Substitui as faixas pelas propostas, se o arquivo ainda for o mesmo."""
+        if generation != self._load_generation:
+            return
+        self.ranges.clear()
+        for start, end in ranges:
+            self.ranges.add(start, end)
+        self.current_range_start = None
+        self.update_range_listbox()
+        self._update_page_view()
+        self.canvas.yview_moveto(0)
+        self._set_status_with_profile(f"{summary} Revise a lista antes de gerar os PDFs.")
+
+    def _set_status_with_profile(self, text):
+        """Exibe o texto na barra de status, com o resumo do perfil se ativo."""
+        if PROFILER.enabled:
+            text = f"{text} | {PROFILER.summary()}"
+        self.status_var.set(text)
+
+    def toggle_profiling(self):
+        """Liga ou desliga o registro do perfil de desempenho."""
+        PROFILER.enabled = self.profile_var.get()
+        if PROFILER.enabled:
+            PROFILER.reset()
+            self.status_var.set("Perfil de desempenho ativado.")
+        else:
+            self.status_var.set("Perfil de desempenho desativado.")
+
+    def export_profile(self):
+        """Exporta as etapas registradas no formato Chrome Trace (JSON)."""
+        path = filedialog.asksaveasfilename(
+            title="Exportar perfil de desempenho",
+            defaultextension=".json",
+            filetypes=[("Chrome Trace (JSON)", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            PROFILER.export(path)
+        except OSError as e:
+            messagebox.showerror("Erro", f"Erro ao exportar o perfil: {e}")
+            return
+        self.status_var.set(f"Perfil exportado para {os.path.basename(path)} | {PROFILER.summary()}")
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = PDFSplitterApp(root)
@@ -0,0 +1,279 @@
+"""Linha de comando para dividir PDFs em lote, sem interface gráfica.
+
+Exemplos:
+    python cortar_cli.py relatorio.pdf --ranges 1-3,4-10,11-
+    python cortar_cli.py lote/*.pdf --ranges 1-1,2- --output-dir saida --jobs 8
+    python cortar_cli.py --manifest lote.json --jobs 8
+    python cortar_cli.py grande.pdf --max-size 10
+    python cortar_cli.py lote/*.pdf --ranges 1-1,2- --optimize --report partes.json
+
+O manifesto é um arquivo JSON com uma lista de trabalhos; caminhos relativos
+são resolvidos a partir da pasta do manifesto:
+
+    [
+        {"input": "a.pdf", "ranges": "1-3,4-", "output_dir": "saida"},
+        {"input": "b.pdf", "ranges": [[1, 2], [3, 5]]},
+        {"input": "c.pdf", "max_mb": 10}
+    ]
+
+Cada divisão é registrada em um diário na pasta de saída: rodar de novo o
+mesmo trabalho (por exemplo, após uma interrupção) só grava as partes que
+faltam, mantendo os mesmos nomes de arquivo.
+
+Com ``max_mb`` (ou ``--max-size``), o arquivo é dividido em partes
+consecutivas de até esse tamanho, em MB, no lugar de faixas fixas. Com
+``"optimize": true`` (ou ``--optimize``), as partes são gravadas compactadas.
+
+Este módulo (e os que ele importa) não depende de tkinter nem do Pillow.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from size_plan import split_file_by_size
+from splitter import split_file
+from worker_pool import process_pool
+
+# Vezes que um trabalho é executado no pool de trabalhos se o processo que o
+# executa morrer (ver run_jobs)
+POOL_ATTEMPTS = 2
+
+
+def job_from_entry(entry, base_dir, default_output_dir="."):
+    """Converte uma entrada do manifesto em um trabalho com caminhos absolutos.
+
+    Caminhos relativos são resolvidos a partir de ``base_dir``. Lança
+    ``ValueError`` se a entrada não for válida.
+    """
+    if not isinstance(entry, dict) or "input" not in entry:
+        raise ValueError("cada trabalho deve indicar o arquivo em \"input\"")
+    if ("max_mb" in entry) == ("ranges" in entry):
+        raise ValueError(f"{entry['input']}: informe \"ranges\" ou \"max_mb\"")
+    job = {
+        "input": os.path.join(base_dir, entry["input"]),
+        "output_dir": os.path.join(base_dir, entry.get("output_dir", default_output_dir)),
+    }
+    if entry.get("optimize"):
+        job["optimize"] = True
+    if "max_mb" in entry:
+        job["max_mb"] = float(entry["max_mb"])
+    else:
+        job["ranges"] = entry["ranges"]
+    return job
+
+
+def load_manifest(path, default_output_dir="."):
+    """Lê o manifesto e retorna a lista de trabalhos com caminhos absolutos."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("jobs", [])
+    base_dir = os.path.dirname(os.path.abspath(path))
+    return [job_from_entry(entry, base_dir, default_output_dir) for entry in data]
+
+
+def _empty_result(job):
+    """Resultado de um trabalho ainda sem nenhuma parte gravada."""
+    return {
+        "input": job["input"], "parts": 0, "skipped": 0, "bytes": 0, "error": None,
+        "oversized": 0, "warm": False, "part_reports": [], "seconds": 0.0,
+    }
+
+
+def run_job(job, workers=None, documents=None):
+    """Executa um trabalho e retorna seu resultado, sem propagar erros.
+
+    O resultado inclui o relatório de cada parte gravada (``part_reports``,
+    ver ``splitter.split_pdf``). Com ``documents`` (um
+    ``document.DocumentCache``), o PDF é obtido do cache, e ``warm`` indica
+    se ele já estava aberto.
+    """
+    start = time.perf_counter()
+    result = _empty_result(job)
+    part_reports = result["part_reports"]
+    options = {
+        "workers": workers,
+        "optimize": job.get("optimize", False),
+        "on_part_written": part_reports.append,
+        "resume": True,
+    }
+    try:
+        if documents is not None:
+            options["document"], result["warm"] = documents.get(job["input"])
+        if "max_mb" in job:
+            paths, oversized = split_file_by_size(
+                job["input"], int(job["max_mb"] * 1024 * 1024), job["output_dir"], **options
+            )
+            result["oversized"] = len(oversized)
+        else:
+            paths = split_file(job["input"], job["ranges"], job["output_dir"], **options)
+        result["parts"] = len(paths)
+        result["bytes"] = sum(report["bytes"] for report in part_reports)
+        result["skipped"] = sum(1 for report in part_reports if report["skipped"])
+        part_reports.sort(key=lambda report: report["part"])
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def _run_job_in_pool(job):
+    """Executa um trabalho em um processo do pool, dividindo no próprio processo."""
+    return run_job(job, workers=1)
+
+
+def run_jobs(jobs, max_jobs=1, on_result=None):
+    """Executa os trabalhos, até ``max_jobs`` arquivos ao mesmo tempo.
+
+    Com um único arquivo por vez, a divisão de cada um pode usar o pool de
+    gravação do splitter; com vários, cada arquivo é dividido inteiramente
+    dentro de um processo do pool de trabalhos.
+
+    Se um processo do pool morrer (por exemplo, com uma falha do MuPDF em um
+    PDF corrompido), todos os trabalhos ainda no pool são perdidos; eles são
+    repetidos em um pool novo, até ``POOL_ATTEMPTS`` vezes cada, e os que
+    esgotarem as tentativas são dados como falhos. Os demais trabalhos do
+    lote seguem normalmente.
+    """
+    results = []
+    if max_jobs <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            result = run_job(job)
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+        return results
+
+    attempts = [0] * len(jobs)
+    pending = list(range(len(jobs)))
+    while pending:
+        retry = []
+        with process_pool(min(max_jobs, len(pending))) as pool:
+            futures = {pool.submit(_run_job_in_pool, jobs[idx]): idx for idx in pending}
+            for future in as_completed(futures):
+                idx = futures[future]
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    attempts[idx] += 1
+                    if attempts[idx] < POOL_ATTEMPTS:
+                        retry.append(idx)
+                        continue
+                    result = _empty_result(jobs[idx])
+                    result["error"] = "o processo que executava o trabalho foi encerrado"
+                except Exception as e:
+                    # Falha do próprio pool, por exemplo ao enviar o trabalho
+                    result = _empty_result(jobs[idx])
+                    result["error"] = str(e)
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+        pending = retry
+    return results
+
+
+def build_parser():
+    """Define os argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(
+        prog="cortar",
+        description="Divide arquivos PDF em várias partes a partir de faixas de páginas.",
+    )
+    parser.add_argument("inputs", nargs="*", help="arquivos PDF a dividir")
+    parser.add_argument(
+        "-r", "--ranges",
+        help='faixas de páginas aplicadas a cada arquivo, ex.: "1-3,4-10,11-"',
+    )
+    parser.add_argument(
+        "-s", "--max-size", type=float, metavar="MB",
+        help="divide cada arquivo em partes consecutivas de até MB megabytes",
+    )
+    parser.add_argument(
+        "--optimize", action="store_true",
+        help="grava partes compactadas (menores, porém mais lentas de gravar)",
+    )
+    parser.add_argument(
+        "--report", metavar="ARQUIVO",
+        help="grava em JSON o tamanho e o tempo de gravação de cada parte",
+    )
+    parser.add_argument("-m", "--manifest", help="manifesto JSON com os trabalhos")
+    parser.add_argument(
+        "-o", "--output-dir", default=".",
+        help="pasta de saída dos arquivos informados na linha de comando",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1,
+        help="quantidade de arquivos processados ao mesmo tempo",
+    )
+    return parser
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    jobs = []
+    if args.manifest:
+        jobs.extend(load_manifest(args.manifest))
+    if args.inputs:
+        if bool(args.ranges) == (args.max_size is not None):
+            parser.error("informe --ranges ou --max-size ao informar arquivos diretamente")
+        for path in args.inputs:
+            job = {"input": path, "output_dir": args.output_dir}
+            if args.max_size is not None:
+                job["max_mb"] = args.max_size
+            else:
+                job["ranges"] = args.ranges
+            jobs.append(job)
+    if not jobs:
+        parser.error("informe arquivos PDF ou um manifesto")
+    if args.optimize:
+        for job in jobs:
+            job["optimize"] = True
+
+    def report(result):
+        name = result["input"]
+        if result["error"]:
+            print(f"ERRO {name}: {result['error']}", file=sys.stderr)
+        else:
+            skipped = f", {result['skipped']} já existentes" if result["skipped"] else ""
+            print(
+                f"{name}: {result['parts']} partes ({result['bytes'] / 1024 / 1024:.1f} MB"
+                f"{skipped}) em {result['seconds']} s"
+            )
+            if result["oversized"]:
+                print(
+                    f"AVISO {name}: {result['oversized']} partes acima do tamanho máximo "
+                    "(páginas maiores que o limite)",
+                    file=sys.stderr,
+                )
+
+    start = time.perf_counter()
+    results = run_jobs(jobs, max_jobs=args.jobs, on_result=report)
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for result in results if result["error"])
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(
+                [
+                    dict(report, input=result["input"])
+                    for result in results
+                    for report in result["part_reports"]
+                ],
+                f,
+                indent=2,
+            )
+    total_parts = sum(result["parts"] for result in results)
+    print(
+        f"{len(results) - failed} de {len(results)} arquivos divididos, "
+        f"{total_parts} partes em {elapsed:.2f} s"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,635 @@
+"""Serviço local que divide PDFs deixados em uma pasta ou enviados por HTTP.
+
+Exemplos:
+    python cortar_service.py --watch entrada --output-dir saida
+    python cortar_service.py --port 8765 --workers 4
+    curl localhost:8765/jobs -H "Content-Type: application/json" \
+        -d '{"input": "/dados/a.pdf", "ranges": "1-3,4-"}'
+    curl "localhost:8765/jobs?name=a.pdf&ranges=1-3,4-" -H "Content-Type: application/pdf" \
+        --data-binary @a.pdf
+    curl localhost:8765/jobs/1
+
+Na pasta vigiada, cada arquivo ``.json`` é um manifesto no formato da linha
+de comando (ver ``cortar_cli``), com caminhos relativos à própria pasta;
+ele deve ser gravado depois dos PDFs que cita. Quando seus trabalhos são
+aceitos, o manifesto é movido para a subpasta ``processados``, onde, ao
+final, é gravado ``<nome>.result.json`` com o resultado de cada trabalho.
+
+Pelo HTTP (apenas em ``127.0.0.1``):
+
+- ``POST /jobs`` com um trabalho (ou uma lista) em JSON
+  (``application/json``), no formato do manifesto, ou com o próprio PDF no
+  corpo (``application/pdf``) e as opções na URL (``name``, ``ranges`` ou
+  ``max_mb``, ``optimize``, ``output_dir``); responde 202 com os números
+  dos trabalhos, ou 503 se a fila estiver cheia;
+- ``GET /jobs`` e ``GET /jobs/<número>``: situação e tempos dos trabalhos;
+- ``GET /status``: tamanho da fila e trabalhos em andamento.
+
+Só são atendidas requisições endereçadas a ``127.0.0.1:<porta>`` ou
+``localhost:<porta>`` (cabeçalho ``Host``), o que impede que uma página
+aberta no navegador use o serviço por meio de um domínio apontado para
+``127.0.0.1`` (DNS rebinding). Exigir ``application/json`` ou
+``application/pdf`` impede o envio a partir de um formulário ou de um
+``fetch`` sem a permissão do CORS, que o serviço não concede.
+
+Os trabalhos aguardam em uma fila limitada e são executados por um pool de
+processos, um arquivo inteiro por processo. Cada processo mantém abertos os
+últimos documentos usados (ver ``document.DocumentCache``), de modo que
+dividir de novo o mesmo arquivo não o relê.
+
+Este módulo (e os que ele importa) não depende de tkinter nem do Pillow.
+"""
+import argparse
+import itertools
+import json
+import os
+import queue
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from cortar_cli import job_from_entry, load_manifest, run_job
+from document import DocumentCache
+from worker_pool import default_pool_size, process_pool
+
+# Trabalhos que podem aguardar na fila; acima disso, novos envios são
+# recusados até que a fila esvazie
+MAX_PENDING_JOBS = 64
+
+# Trabalhos concluídos cuja situação continua disponível
+MAX_FINISHED_JOBS = 1000
+
+# Documentos mantidos abertos por processo do pool
+WARM_DOCUMENTS = 8
+
+# Intervalo, em segundos, entre as verificações da pasta vigiada; um
+# manifesto só é lido depois de ficar esse tempo sem alterações
+WATCH_INTERVAL = 2.0
+
+# Tempo sugerido ao cliente, em segundos, para reenviar com a fila cheia
+RETRY_AFTER_SECONDS = 5
+
+# Tamanho dos blocos lidos de um PDF recebido por HTTP
+UPLOAD_CHUNK_BYTES = 1 << 20
+
+# Documentos abertos pelo processo do pool (ver _init_worker)
+_worker_documents = None
+
+
+def default_service_workers():
+    """Número de processos que executam os trabalhos (``CORTAR_SERVICE_WORKERS``).
+
+    Com 1, os trabalhos são executados, um por vez, no próprio serviço.
+    """
+    return default_pool_size("CORTAR_SERVICE_WORKERS")
+
+
+def _init_worker(warm_documents):
+    """Cria o cache de documentos de cada processo do pool."""
+    global _worker_documents
+    # O Ctrl+C é tratado pelo serviço, que termina os trabalhos já na fila
+    # antes de encerrar o pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_documents = DocumentCache(warm_documents)
+
+
+def _documents_for(job, documents):
+    """Cache de documentos a usar no trabalho, ou None para abrir o PDF só para ele.
+
+    Um PDF recebido por HTTP é apagado ao fim do trabalho e nunca é dividido
+    de novo: mantê-lo aberto só ocuparia o lugar de documentos reutilizáveis
+    (e, no Windows, impediria que ele fosse apagado).
+    """
+    return None if job.get("spooled") else documents
+
+
+def _run_job_in_pool(job):
+    """Executa um trabalho em um processo do pool, com seus documentos abertos."""
+    return run_job(job, workers=1, documents=_documents_for(job, _worker_documents))
+
+
+class QueueFullError(Exception):
+    """A fila de trabalhos não comporta os trabalhos enviados."""
+
+
+class SplitService:
+    """Fila de trabalhos de divisão executados por um pool de processos.
+
+    ``submit`` enfileira trabalhos (no formato de ``cortar_cli``) e retorna
+    seus números; com a fila cheia, lança ``QueueFullError`` sem enfileirar
+    nenhum deles. Há uma thread por processo do pool, e cada uma só retira um
+    trabalho da fila quando o anterior termina: os trabalhos em espera ficam
+    todos na fila limitada, e não acumulados no pool.
+
+    Dois trabalhos com o mesmo PDF e a mesma pasta de saída nunca são
+    executados ao mesmo tempo, pois gravariam as mesmas partes (e o mesmo
+    diário, ver ``job_manifest``): o segundo espera o fim do primeiro.
+
+    Se um processo do pool morrer (por exemplo, com uma falha do MuPDF em
+    um PDF corrompido), o pool é recriado. Como todos os trabalhos em
+    andamento no pool perdem o processo, cada um é repetido uma vez no pool
+    novo; só o que derrubar o pool de novo é dado como falho.
+
+    A situação de cada trabalho (``status``) passa por ``queued``,
+    ``running`` e ``done`` ou ``failed``, com os tempos de espera na fila
+    (``queue_seconds``) e de execução (``run_seconds``).
+    """
+
+    def __init__(self, workers=None, max_pending=MAX_PENDING_JOBS, warm_documents=WARM_DOCUMENTS,
+                 on_finished=None):
+        """Inicia o pool e as threads que executam os trabalhos.
+
+        ``on_finished(situação)`` é chamado, em uma dessas threads, ao fim de
+        cada trabalho.
+        """
+        self.workers = default_service_workers() if workers is None else max(1, workers)
+        self.on_finished = on_finished
+        self._warm_documents = warm_documents
+        self._queue = queue.Queue(maxsize=max(1, max_pending))
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._active = set()  # (PDF, pasta de saída) dos trabalhos em execução
+        self._ids = itertools.count(1)
+        self._jobs = {}  # Número -> situação, na ordem de envio
+        self._running = 0
+        self._closed = False
+        self._pool = None
+        self._documents = None
+        if self.workers > 1:
+            self._pool = process_pool(self.workers, _init_worker, (warm_documents,))
+        else:
+            self._documents = DocumentCache(warm_documents)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"SplitService-{i + 1}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, jobs):
+        """Enfileira os trabalhos, todos ou nenhum, e retorna seus números.
+
+        Lança ``ValueError`` se os trabalhos não couberem nem na fila vazia.
+        """
+        if len(jobs) > self._queue.maxsize:
+            raise ValueError(
+                f"{len(jobs)} trabalhos excedem o tamanho da fila ({self._queue.maxsize})"
+            )
+        with self._lock:
+            if self._closed:
+                raise QueueFullError("o serviço está sendo encerrado")
+            # Só esta função coloca itens na fila, sempre com o lock: o espaço
+            # livre verificado aqui não diminui até o fim do laço
+            if self._queue.maxsize - self._queue.qsize() < len(jobs):
+                raise QueueFullError(
+                    f"fila cheia ({self._queue.qsize()} de {self._queue.maxsize} trabalhos)"
+                )
+            ids = []
+            for job in jobs:
+                job_id = next(self._ids)
+                self._jobs[job_id] = {
+                    "id": job_id, "input": job["input"], "output_dir": job["output_dir"],
+                    "status": "queued", "submitted": time.time(),
+                    "queue_seconds": None, "run_seconds": None, "result": None,
+                }
+                self._queue.put_nowait((job_id, job, time.perf_counter()))
+                ids.append(job_id)
+            self._forget_finished()
+        return ids
+
+    def status(self, job_id):
+        """Retorna uma cópia da situação do trabalho, ou None se não existir."""
+        with self._lock:
+            status = self._jobs.get(job_id)
+            return None if status is None else dict(status)
+
+    def jobs(self):
+        """Situação de todos os trabalhos conhecidos, sem os relatórios das partes."""
+        with self._lock:
+            return [
+                dict(status, result=None if status["result"] is None else {
+                    key: value for key, value in status["result"].items() if key != "part_reports"
+                })
+                for status in self._jobs.values()
+            ]
+
+    def stats(self):
+        """Tamanho da fila, trabalhos em andamento e capacidade do serviço."""
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "max_queued": self._queue.maxsize,
+                "running": self._running,
+                "workers": self.workers,
+            }
+
+    def close(self):
+        """Recusa novos trabalhos, espera os enfileirados e encerra o pool."""
+        with self._lock:
+            self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self._pool is not None:
+            self._pool.shutdown()
+        if self._documents is not None:
+            self._documents.close()
+
+    def _forget_finished(self):
+        """Descarta os trabalhos concluídos mais antigos além de ``MAX_FINISHED_JOBS``."""
+        finished = [
+            job_id for job_id, status in self._jobs.items()
+            if status["status"] in ("done", "failed")
+        ]
+        for job_id in finished[:-MAX_FINISHED_JOBS]:
+            del self._jobs[job_id]
+
+    def _run_in_pool(self, job, attempts=2):
+        """Executa o trabalho no pool, recriando-o se um processo tiver morrido."""
+        for attempt in range(attempts):
+            with self._lock:
+                pool = self._pool
+            try:
+                return pool.submit(_run_job_in_pool, job).result()
+            except BrokenProcessPool:
+                with self._lock:
+                    # Outra thread com um trabalho no mesmo pool pode já tê-lo recriado
+                    if self._pool is pool:
+                        pool.shutdown(wait=False)
+                        self._pool = process_pool(
+                            self.workers, _init_worker, (self._warm_documents,)
+                        )
+                if attempt == attempts - 1:
+                    raise
+
+    def _run(self):
+        """Laço de uma thread de execução."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            job_id, job, queued_at = item
+            key = (os.path.abspath(job["input"]), os.path.abspath(job["output_dir"]))
+            with self._lock:
+                while key in self._active:
+                    self._released.wait()
+                self._active.add(key)
+                started = time.perf_counter()
+                self._running += 1
+                status = self._jobs[job_id]
+                status["status"] = "running"
+                status["queue_seconds"] = round(started - queued_at, 3)
+            try:
+                if self._pool is not None:
+                    result = self._run_in_pool(job)
+                else:
+                    result = run_job(
+                        job, workers=1, documents=_documents_for(job, self._documents)
+                    )
+            except BrokenProcessPool:
+                result = {
+                    "input": job["input"],
+                    "error": "o processo que executava o trabalho foi encerrado",
+                }
+            except Exception as e:
+                # Falha do próprio pool
+                result = {"input": job["input"], "error": str(e)}
+            finally:
+                if job.get("spooled"):
+                    shutil.rmtree(os.path.dirname(job["input"]), ignore_errors=True)
+            with self._lock:
+                self._active.discard(key)
+                self._released.notify_all()
+                self._running -= 1
+                status["status"] = "failed" if result["error"] else "done"
+                status["run_seconds"] = round(time.perf_counter() - started, 3)
+                status["result"] = result
+                finished = dict(status)
+            if self.on_finished is not None:
+                self.on_finished(finished)
+
+
+class FolderWatcher:
+    """Verifica periodicamente uma pasta e envia ao serviço os manifestos novos."""
+
+    def __init__(self, service, folder, output_dir, interval=WATCH_INTERVAL):
+        """Prepara a vigilância de ``folder``; trabalhos sem pasta de saída usam ``output_dir``."""
+        self.service = service
+        self.folder = folder
+        self.output_dir = output_dir
+        self.interval = interval
+        self.processed_dir = os.path.join(folder, "processados")
+        self._waiting = {}  # Caminho do resultado -> números dos trabalhos
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="FolderWatcher", daemon=True)
+
+    def start(self):
+        """Inicia a vigilância em uma thread própria."""
+        os.makedirs(self.processed_dir, exist_ok=True)
+        self._thread.start()
+
+    def stop(self):
+        """Encerra a vigilância."""
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self):
+        """Laço da thread de vigilância."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.scan()
+            except OSError as e:
+                print(f"ERRO ao verificar {self.folder}: {e}", file=sys.stderr)
+
+    def scan(self):
+        """Envia os manifestos prontos e grava os resultados dos concluídos."""
+        now = time.time()
+        manifests = sorted(
+            (entry.stat().st_mtime, entry.path)
+            for entry in os.scandir(self.folder)
+            if entry.is_file() and entry.name.endswith(".json")
+        )
+        for mtime, path in manifests:
+            if now - mtime < self.interval:
+                continue  # Ainda pode estar sendo gravado
+            # Com a fila cheia, o manifesto aguarda a próxima verificação; os
+            # seguintes, com menos trabalhos, ainda podem caber
+            self._submit_manifest(path)
+        self._write_results()
+
+    def _submit_manifest(self, path):
+        """Envia os trabalhos de um manifesto; retorna False se a fila estiver cheia.
+
+        Um manifesto inválido, ou com mais trabalhos do que a fila comporta,
+        é movido para ``processados`` com o erro em seu resultado.
+        """
+        name = os.path.splitext(os.path.basename(path))[0]
+        result_path = os.path.join(self.processed_dir, f"{name}.result.json")
+        try:
+            jobs = load_manifest(path, default_output_dir=os.path.abspath(self.output_dir))
+            ids = self.service.submit(jobs)
+        except QueueFullError:
+            return False
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"ERRO {path}: manifesto inválido: {e}", file=sys.stderr)
+            ids = None
+            self._write_json(result_path, {"error": f"manifesto inválido: {e}"})
+        os.replace(path, os.path.join(self.processed_dir, os.path.basename(path)))
+        if ids is not None:
+            print(f"{path}: {len(ids)} trabalhos na fila ({', '.join(map(str, ids))})")
+            self._waiting[result_path] = ids
+        return True
+
+    def _write_results(self):
+        """Grava o resultado dos manifestos cujos trabalhos terminaram."""
+        for result_path, ids in list(self._waiting.items()):
+            statuses = [self.service.status(job_id) for job_id in ids]
+            if any(status is not None and status["status"] in ("queued", "running")
+                   for status in statuses):
+                continue
+            self._write_json(result_path, [status for status in statuses if status is not None])
+            del self._waiting[result_path]
+
+    @staticmethod
+    def _write_json(path, data):
+        """Grava ``data`` em ``path`` de forma atômica."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """Atende ao HTTP do serviço; ``server.service`` é o ``SplitService``."""
+
+    def _check_host(self):
+        """Recusa a requisição (403) se ela não for endereçada ao próprio serviço."""
+        port = self.server.server_address[1]
+        if self.headers.get("Host", "").lower() in (f"127.0.0.1:{port}", f"localhost:{port}"):
+            return True
+        self._send(403, {"error": "cabeçalho Host não permitido"})
+        return False
+
+    def do_GET(self):
+        """Consulta a situação dos trabalhos ou do serviço."""
+        if not self._check_host():
+            return
+        path = urlsplit(self.path).path.rstrip("/")
+        service = self.server.service
+        if path == "/status":
+            self._send(200, service.stats())
+        elif path == "/jobs":
+            self._send(200, service.jobs())
+        elif path.startswith("/jobs/"):
+            try:
+                status = service.status(int(path[len("/jobs/"):]))
+            except ValueError:
+                status = None
+            if status is None:
+                self._send(404, {"error": "trabalho não encontrado"})
+            else:
+                self._send(200, status)
+        else:
+            self._send(404, {"error": "endereço não encontrado"})
+
+    def do_POST(self):
+        """Recebe novos trabalhos."""
+        if not self._check_host():
+            return
+        url = urlsplit(self.path)
+        if url.path.rstrip("/") != "/jobs":
+            self._send(404, {"error": "endereço não encontrado"})
+            return
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type not in ("application/json", "application/pdf"):
+            self._send(415, {"error": "envie application/json ou application/pdf"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            self._send(400, {"error": "Content-Length inválido"})
+            return
+        head = self.rfile.read(min(length, UPLOAD_CHUNK_BYTES))
+        remaining = length - len(head)
+        spool_dir = None
+        try:
+            if content_type == "application/pdf":
+                if not head.startswith(b"%PDF"):
+                    raise ValueError("o corpo não é um arquivo PDF")
+                jobs, spool_dir = self._spooled_job(parse_qs(url.query), head, remaining)
+            else:
+                entries = json.loads(head + self.rfile.read(remaining))
+                if not isinstance(entries, list):
+                    entries = [entries]
+                jobs = [
+                    job_from_entry(entry, os.getcwd(), self.server.output_dir)
+                    for entry in entries
+                ]
+            ids = self.server.service.submit(jobs)
+        except QueueFullError as e:
+            self._discard(spool_dir)
+            self._send(503, {"error": str(e)}, {"Retry-After": str(RETRY_AFTER_SECONDS)})
+            return
+        except (ValueError, TypeError, KeyError) as e:
+            self._discard(spool_dir)
+            self._send(400, {"error": str(e)})
+            return
+        except OSError as e:
+            self._discard(spool_dir)
+            self._send(500, {"error": str(e)})
+            return
+        self._send(202, {"jobs": ids})
+
+    def _spooled_job(self, query, head, remaining):
+        """Grava o PDF recebido na pasta temporária e monta seu trabalho.
+
+        O corpo é copiado em blocos, a partir de ``head`` (já lido) e dos
+        ``remaining`` bytes restantes, sem ser mantido inteiro na memória.
+        """
+        options = {key: values[-1] for key, values in query.items()}
+        # O nome do arquivo dá nome às partes (Parte_N_<nome>.pdf)
+        name = os.path.basename(options.pop("name", "documento.pdf")) or "documento.pdf"
+        if not name.lower().endswith(".pdf"):
+            name += ".pdf"
+        options["optimize"] = options.get("optimize", "").lower() in ("1", "true", "sim")
+        spool_dir = tempfile.mkdtemp(prefix="cortar-job-", dir=self.server.spool_dir)
+        path = os.path.join(spool_dir, name)
+        try:
+            with open(path, "wb") as f:
+                f.write(head)
+                while remaining > 0:
+                    chunk = self.rfile.read(min(remaining, UPLOAD_CHUNK_BYTES))
+                    if not chunk:
+                        raise ValueError("envio interrompido antes do fim do arquivo")
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            job = job_from_entry(dict(options, input=path), os.getcwd(), self.server.output_dir)
+        except BaseException:
+            self._discard(spool_dir)
+            raise
+        # A cópia recebida é apagada ao fim do trabalho
+        job["spooled"] = True
+        return [job], spool_dir
+
+    @staticmethod
+    def _discard(spool_dir):
+        """Apaga a cópia de um PDF recebido que não entrou na fila."""
+        if spool_dir is not None:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+
+    def _send(self, code, data, headers=None):
+        """Responde com ``data`` em JSON."""
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        """Silencia o registro de cada requisição; os trabalhos são relatados à parte."""
+
+
+def build_parser():
+    """Define os argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(
+        prog="cortar-service",
+        description="Divide PDFs deixados em uma pasta ou enviados por HTTP.",
+    )
+    parser.add_argument("-w", "--watch", metavar="PASTA", help="pasta vigiada com os manifestos")
+    parser.add_argument(
+        "-p", "--port", type=int,
+        help="porta do HTTP local (em 127.0.0.1) para enviar trabalhos",
+    )
+    parser.add_argument(
+        "-o", "--output-dir", default=".",
+        help="pasta de saída dos trabalhos que não indicarem uma",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=default_service_workers(),
+        help="quantidade de arquivos processados ao mesmo tempo",
+    )
+    parser.add_argument(
+        "--max-queued", type=int, default=MAX_PENDING_JOBS,
+        help="trabalhos que podem aguardar na fila antes de novos envios serem recusados",
+    )
+    parser.add_argument(
+        "--warm-documents", type=int, default=WARM_DOCUMENTS,
+        help="documentos mantidos abertos por processo, para divisões repetidas",
+    )
+    return parser
+
+
+def main(argv=None):
+    """Ponto de entrada do serviço."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.watch and args.port is None:
+        parser.error("informe --watch, --port ou ambos")
+
+    def report(status):
+        result = status["result"]
+        if result["error"]:
+            print(f"ERRO [{status['id']}] {status['input']}: {result['error']}", file=sys.stderr)
+        else:
+            warm = ", documento já aberto" if result.get("warm") else ""
+            print(
+                f"[{status['id']}] {status['input']}: {result['parts']} partes "
+                f"({result['bytes'] / 1024 / 1024:.1f} MB{warm}) em {status['run_seconds']} s, "
+                f"{status['queue_seconds']} s na fila"
+            )
+            if result["oversized"]:
+                print(
+                    f"AVISO [{status['id']}] {status['input']}: {result['oversized']} partes "
+                    "acima do tamanho máximo (páginas maiores que o limite)",
+                    file=sys.stderr,
+                )
+
+    service = SplitService(
+        workers=args.workers, max_pending=args.max_queued,
+        warm_documents=args.warm_documents, on_finished=report,
+    )
+    watcher = server = spool_dir = None
+    try:
+        if args.watch:
+            watcher = FolderWatcher(service, args.watch, args.output_dir)
+            watcher.start()
+            print(f"Vigiando {os.path.abspath(args.watch)}")
+        if args.port is not None:
+            server = ThreadingHTTPServer(("127.0.0.1", args.port), ServiceRequestHandler)
+            spool_dir = tempfile.mkdtemp(prefix="cortar-spool-")
+            server.service = service
+            server.output_dir = os.path.abspath(args.output_dir)
+            server.spool_dir = spool_dir
+            threading.Thread(target=server.serve_forever, name="HTTP", daemon=True).start()
+            print(f"Recebendo trabalhos em http://127.0.0.1:{server.server_address[1]}/jobs")
+        print(f"{service.workers} processos, até {args.max_queued} trabalhos na fila (Ctrl+C encerra)")
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print("Encerrando; aguardando os trabalhos da fila...")
+    finally:
+        if server is not None:
+            server.shutdown()
+        if watcher is not None:
+            watcher.stop()
+        service.close()
+        if watcher is not None:
+            watcher._write_results()  # Resultados dos últimos trabalhos
+        if spool_dir is not None:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
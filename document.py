@@ -0,0 +1,125 @@
+"""Documento PDF compartilhado entre contagem, renderização e divisão."""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import fitz  # PyMuPDF
+
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """Calcula o hash do conteúdo do arquivo, lendo-o em blocos."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PDFDocument:
+    """Abre o PDF uma única vez e o compartilha entre os componentes.
+
+    O arquivo é lido pelo PyMuPDF sob demanda, diretamente do disco, sem
+    carregá-lo inteiro na memória. Como um documento do PyMuPDF não pode ser
+    usado por várias threads ao mesmo tempo, todo acesso deve ser feito com
+    ``lock`` adquirido.
+
+    Quem usa o documento em uma thread de longa duração deve chamar
+    ``acquire()``/``release()``: um ``close()`` pedido nesse meio tempo só é
+    efetivado quando o último usuário o liberar.
+    """
+
+    def __init__(self, path):
+        """Abre o documento indicado por ``path``."""
+        self.path = path
+        self.doc = fitz.open(path)
+        if not self.doc.is_pdf:
+            self.doc.close()
+            raise ValueError(f"{path} não é um arquivo PDF")
+        self.page_count = len(self.doc)
+        self.lock = threading.RLock()
+        self._users = 0
+        self._close_requested = False
+        self._fingerprint = None
+
+    def acquire(self):
+        """Registra um usuário, adiando o fechamento até que ele termine."""
+        with self.lock:
+            if self.doc.is_closed:
+                raise ValueError("O documento já foi fechado")
+            self._users += 1
+
+    def release(self):
+        """Libera um usuário registrado por ``acquire()``."""
+        with self.lock:
+            self._users -= 1
+            if self._users == 0 and self._close_requested:
+                self.doc.close()
+
+    def close(self):
+        """Fecha o documento assim que não houver mais usuários."""
+        with self.lock:
+            self._close_requested = True
+            if self._users == 0 and not self.doc.is_closed:
+                self.doc.close()
+
+    def fingerprint(self, compute=None):
+        """Hash do conteúdo do arquivo (ver ``file_fingerprint``), calculado uma vez.
+
+        ``compute(caminho)`` pode substituir ``file_fingerprint`` no cálculo,
+        por exemplo ``ThumbnailCache.fingerprint``, que memoriza o hash entre
+        execuções e evita reler um arquivo já conhecido.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = (compute or file_fingerprint)(self.path)
+        return self._fingerprint
+
+    def page_rect(self, index):
+        """Retângulo (já considerando a rotação) da página de índice ``index``."""
+        with self.lock:
+            return self.doc[index].rect
+
+
+class DocumentCache:
+    """Mantém abertos os documentos usados mais recentemente.
+
+    Dividir de novo o mesmo arquivo reaproveita o ``PDFDocument`` já aberto:
+    o PyMuPDF não volta a ler a estrutura do PDF e o hash do conteúdo não é
+    recalculado. Um arquivo alterado desde a abertura (outro tamanho ou data
+    de modificação) é reaberto. Acima de ``capacity`` documentos, os usados
+    há mais tempo são fechados.
+
+    O cache não é protegido contra o uso por várias threads ao mesmo tempo.
+    """
+
+    def __init__(self, capacity):
+        """Cria um cache vazio para até ``capacity`` documentos."""
+        self.capacity = max(1, capacity)
+        self._documents = OrderedDict()  # Caminho -> (assinatura, PDFDocument)
+
+    def __len__(self):
+        return len(self._documents)
+
+    def get(self, path):
+        """Retorna ``(documento, já estava aberto)`` para o PDF em ``path``."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        entry = self._documents.pop(path, None)
+        if entry is not None:
+            if entry[0] == stamp:
+                self._documents[path] = entry
+                return entry[1], True
+            entry[1].close()
+        document = PDFDocument(path)
+        self._documents[path] = (stamp, document)
+        while len(self._documents) > self.capacity:
+            _, (_, oldest) = self._documents.popitem(last=False)
+            oldest.close()
+        return document, False
+
+    def close(self):
+        """Fecha todos os documentos do cache."""
+        while self._documents:
+            _, (_, document) = self._documents.popitem()
+            document.close()
@@ -0,0 +1,86 @@
+"""Armazenamento em memória das páginas renderizadas, com limite de RAM."""
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+DEFAULT_BUDGET_MB = 256
+
+
+class PageImageStore:
+    """Guarda as páginas renderizadas dentro de um orçamento de memória.
+
+    As imagens são mantidas como bytes RGB crus, bem mais compactos que
+    objetos PIL, e só são reconstruídas (sem cópia) quando solicitadas.
+    Quando o total ultrapassa o orçamento, as páginas vistas há mais tempo
+    são descartadas; o renderer volta a gerá-las se forem pedidas de novo.
+
+    O orçamento pode ser definido pela variável de ambiente
+    ``CORTAR_IMAGE_MB``.
+    """
+
+    def __init__(self, budget_mb=None):
+        """Cria o armazenamento vazio com o orçamento indicado."""
+        if budget_mb is None:
+            budget_mb = float(os.environ.get("CORTAR_IMAGE_MB", DEFAULT_BUDGET_MB))
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self._entries = OrderedDict()  # índice -> (tamanho, pixels), do menos ao mais recente
+        self._footprint = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, index):
+        with self._lock:
+            return index in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def footprint(self):
+        """Memória ocupada pelos pixels armazenados, em bytes."""
+        return self._footprint
+
+    def put(self, index, img):
+        """Armazena a imagem da página e descarta as mais antigas se preciso."""
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        data = img.tobytes()
+        with self._lock:
+            old = self._entries.pop(index, None)
+            if old is not None:
+                self._footprint -= len(old[1])
+            self._entries[index] = (img.size, data)
+            self._footprint += len(data)
+            self._evict()
+
+    def get(self, index):
+        """Retorna a imagem PIL da página, ou None se ela não estiver guardada."""
+        with self._lock:
+            entry = self._entries.get(index)
+            if entry is None:
+                return None
+            self._entries.move_to_end(index)
+        size, data = entry
+        return Image.frombuffer("RGB", size, data, "raw", "RGB", 0, 1)
+
+    def touch(self, pages):
+        """Marca as páginas como vistas agora, protegendo-as do descarte."""
+        with self._lock:
+            for index in pages:
+                if index in self._entries:
+                    self._entries.move_to_end(index)
+
+    def clear(self):
+        """Descarta todas as páginas."""
+        with self._lock:
+            self._entries.clear()
+            self._footprint = 0
+
+    def _evict(self):
+        """Remove as páginas vistas há mais tempo até respeitar o orçamento."""
+        # A página mais recente é sempre mantida, mesmo acima do orçamento
+        while self._footprint > self.budget_bytes and len(self._entries) > 1:
+            _, (_, data) = self._entries.popitem(last=False)
+            self._footprint -= len(data)
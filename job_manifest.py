@@ -0,0 +1,171 @@
+"""Diário dos trabalhos de divisão, para retomá-los após uma interrupção."""
+import hashlib
+import json
+import logging
+import os
+
+from document import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Versão do formato gravado; diários de outra versão são ignorados
+_FORMAT_VERSION = 1
+
+
+def job_key(fingerprint, ranges, optimize):
+    """Identifica um trabalho pelo conteúdo do PDF, pelas faixas e pelas opções."""
+    description = json.dumps([fingerprint, [list(r) for r in ranges], bool(optimize)])
+    return hashlib.blake2b(description.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class SplitJob:
+    """Diário de um trabalho de divisão, guardado na pasta de saída.
+
+    A primeira linha do arquivo descreve o trabalho: o PDF de origem, as
+    faixas, as opções e o nome reservado para cada parte. Cada linha seguinte
+    registra uma parte concluída, com seu tamanho, data de modificação e
+    checksum. Como as linhas são apenas acrescentadas, registrar uma parte
+    não regrava o diário inteiro, e uma linha incompleta ao final (queda
+    durante a gravação) é simplesmente ignorada.
+
+    Rodar de novo o mesmo trabalho reaproveita os nomes reservados e só
+    grava as partes que faltam ou que não conferem com o diário.
+    """
+
+    def __init__(self, path, header, output_dir, completed):
+        """Use ``SplitJob.open`` para obter o diário de um trabalho."""
+        self.path = path
+        self.header = header
+        self.output_dir = output_dir
+        # Caminho de cada parte, na ordem das faixas
+        self.paths = [os.path.join(output_dir, name) for name in header["parts"]]
+        # Índice da parte -> {"bytes", "mtime_ns", "checksum"}
+        self.completed = completed
+        self._journal = None
+        # O diário termina em uma linha interrompida, que o próximo registro
+        # não pode continuar
+        self._torn_tail = False
+
+    @classmethod
+    def open(cls, pdf_path, ranges, output_dir, optimize, resolve_paths, fingerprint=None):
+        """Retoma o diário do trabalho, ou cria um novo.
+
+        ``resolve_paths()`` só é chamado para um trabalho novo e deve
+        retornar os caminhos das partes, na ordem das faixas. ``fingerprint``
+        é o hash do PDF, se já conhecido (ver ``file_fingerprint``).
+        """
+        if fingerprint is None:
+            fingerprint = file_fingerprint(pdf_path)
+        key = job_key(fingerprint, ranges, optimize)
+        base = os.path.splitext(os.path.basename(pdf_path))[0]
+        path = os.path.join(output_dir, f".{base}.{key}.cortar-job.jsonl")
+        job = cls._load(path, output_dir, len(ranges))
+        if job is not None:
+            return job
+
+        paths = resolve_paths()
+        header = {
+            "version": _FORMAT_VERSION,
+            "source": os.path.abspath(pdf_path),
+            "ranges": [list(r) for r in ranges],
+            "optimize": bool(optimize),
+            # Nomes relativos, para que a pasta possa ser movida
+            "parts": [os.path.relpath(p, output_dir) for p in paths],
+        }
+        job = cls(path, header, output_dir, {})
+        job._rewrite()
+        return job
+
+    @classmethod
+    def _load(cls, path, output_dir, count):
+        """Lê um diário existente, ou retorna None se não houver um válido."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("Não foi possível ler o diário %s: %s", path, e)
+            return None
+        lines = text.splitlines()
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError):
+            return None
+        if header.get("version") != _FORMAT_VERSION or len(header.get("parts", ())) != count:
+            return None
+        completed = {}
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+                completed[entry["part"] - 1] = entry
+            except (ValueError, KeyError, TypeError):
+                continue  # Linha interrompida no meio da gravação
+        job = cls(path, header, output_dir, completed)
+        job._torn_tail = not text.endswith("\n")
+        return job
+
+    def _rewrite(self):
+        """Regrava o diário inteiro: o cabeçalho e as partes concluídas."""
+        self.close()
+        lines = [self.header] + [self.completed[idx] for idx in sorted(self.completed)]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(line) + "\n" for line in lines)
+        os.replace(tmp_path, self.path)
+        self._torn_tail = False
+
+    def reassign(self, paths):
+        """Reserva outros nomes para as partes indicadas (índice -> caminho).
+
+        Os registros dessas partes são descartados, e o diário é regravado
+        com os novos nomes.
+        """
+        for idx, path in paths.items():
+            self.paths[idx] = path
+            self.completed.pop(idx, None)
+        self.header["parts"] = [os.path.relpath(p, self.output_dir) for p in self.paths]
+        self._rewrite()
+
+    def is_complete(self, idx, verify=False):
+        """Indica se a parte ``idx`` está gravada e confere com o diário.
+
+        Basta que o tamanho e a data de modificação confiram, como fazem as
+        ferramentas de sincronização; com ``verify``, o conteúdo também é
+        comparado com o checksum, o que exige ler a parte inteira.
+        """
+        entry = self.completed.get(idx)
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(self.paths[idx])
+            if stat.st_size != entry["bytes"]:
+                return False
+            # Registros sem data de modificação são conferidos pelo checksum
+            if not verify and stat.st_mtime_ns == entry.get("mtime_ns"):
+                return True
+            return file_fingerprint(self.paths[idx]) == entry["checksum"]
+        except OSError:
+            return False
+
+    def record(self, report):
+        """Registra uma parte concluída (um relatório de ``split_pdf``)."""
+        entry = {
+            "part": report["part"], "bytes": report["bytes"],
+            "mtime_ns": os.stat(report["path"]).st_mtime_ns, "checksum": report["checksum"],
+            "baseline_bytes": report.get("baseline_bytes"),
+        }
+        if self._journal is None:
+            self._journal = open(self.path, "a", encoding="utf-8")
+            if self._torn_tail:
+                self._journal.write("\n")
+        self._journal.write(json.dumps(entry) + "\n")
+        # Sem buffer pendente, uma queda do processo não perde o registro
+        self._journal.flush()
+        self.completed[report["part"] - 1] = entry
+
+    def close(self):
+        """Fecha o diário."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
@@ -0,0 +1,136 @@
+"""Medição opcional do tempo e da memória de cada etapa do processamento.
+
+A coleta fica desligada por padrão e pode ser ativada pela variável de
+ambiente ``CORTAR_PROFILE=1`` ou pelo menu da aplicação. Os eventos podem
+ser exportados no formato Chrome Trace (JSON), que pode ser aberto em
+``chrome://tracing`` ou no Perfetto.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Limite de eventos guardados, para que uma sessão longa não esgote a memória
+MAX_EVENTS = 200_000
+
+
+def current_rss():
+    """Memória residente atual do processo em bytes, ou None se indisponível."""
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class Profiler:
+    """Registra a duração e a variação de memória de etapas nomeadas."""
+
+    def __init__(self, enabled=False):
+        """Cria o profiler, ligado ou desligado."""
+        self.enabled = enabled
+        self.dropped = 0
+        self._events = []
+        self._thread_names = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+
+    @contextmanager
+    def stage(self, name, **args):
+        """Mede o bloco ``with`` como uma etapa chamada ``name``.
+
+        Argumentos extras (ex.: o índice da página) são guardados no evento.
+        Com o profiler desligado, o custo é apenas o de uma verificação.
+        """
+        if not self.enabled:
+            yield
+            return
+        rss_before = current_rss()
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            rss_after = current_rss()
+            if rss_before is not None and rss_after is not None:
+                args["mem_delta_kb"] = (rss_after - rss_before) // 1024
+            self._record(name, start, end, args)
+
+    def _record(self, name, start, end, args):
+        """Guarda um evento concluído."""
+        thread = threading.current_thread()
+        with self._lock:
+            if len(self._events) >= MAX_EVENTS:
+                self.dropped += 1
+                return
+            self._thread_names[thread.ident] = thread.name
+            self._events.append((name, start, end, thread.ident, args))
+
+    def reset(self):
+        """Descarta os eventos registrados."""
+        with self._lock:
+            self._events = []
+            self._thread_names = {}
+            self.dropped = 0
+            self._origin = time.perf_counter_ns()
+
+    def totals(self):
+        """Retorna ``{etapa: (ocorrências, segundos, variação de memória em KB)}``."""
+        totals = {}
+        with self._lock:
+            events = list(self._events)
+        for name, start, end, _, args in events:
+            count, seconds, mem_kb = totals.get(name, (0, 0.0, 0))
+            totals[name] = (
+                count + 1,
+                seconds + (end - start) / 1e9,
+                mem_kb + args.get("mem_delta_kb", 0),
+            )
+        return totals
+
+    def summary(self, top=3):
+        """Resumo curto das etapas mais demoradas, para a barra de status."""
+        totals = sorted(self.totals().items(), key=lambda item: item[1][1], reverse=True)
+        if not totals:
+            return "Perfil: nenhuma etapa registrada"
+        parts = [
+            f"{name} {seconds:.2f} s ({count}×)"
+            for name, (count, seconds, _) in totals[:top]
+        ]
+        return "Perfil: " + ", ".join(parts)
+
+    def export(self, path):
+        """Grava os eventos no formato Chrome Trace (JSON)."""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self._events)
+            thread_names = dict(self._thread_names)
+            origin = self._origin
+        trace = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in thread_names.items()
+        ]
+        for name, start, end, tid, args in events:
+            trace.append({
+                "name": name,
+                "ph": "X",
+                "pid": pid,
+                "tid": tid,
+                "ts": (start - origin) / 1000,  # microssegundos
+                "dur": (end - start) / 1000,
+                "args": args,
+            })
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+
+# Instância usada por toda a aplicação
+PROFILER = Profiler(enabled=os.environ.get("CORTAR_PROFILE") == "1")
@@ -0,0 +1,84 @@
+"""Conjunto ordenado de faixas de páginas sem sobreposição."""
+from bisect import bisect_left, bisect_right
+
+
+class RangeOverlapError(ValueError):
+    """A faixa informada se sobrepõe a faixas já existentes."""
+
+    def __init__(self, start, end, conflicts):
+        self.start = start
+        self.end = end
+        self.conflicts = conflicts  # Faixas [início, fim) em conflito
+        first, last = conflicts[0]
+        super().__init__(
+            f"As páginas {start+1} - {end} se sobrepõem à faixa {first+1} - {last}."
+        )
+
+
+class RangeStore:
+    """Faixas [início, fim) disjuntas, mantidas em ordem de página.
+
+    Como as faixas não se sobrepõem, tanto os inícios quanto os fins ficam
+    ordenados, e as consultas ("qual faixa contém a página N", "quais faixas
+    cruzam um intervalo") são buscas binárias. A posição de cada faixa na
+    ordem é também o número da parte gerada a partir dela.
+    """
+
+    def __init__(self, ranges=()):
+        """Cria o conjunto, opcionalmente já com as faixas informadas."""
+        self._starts = []
+        self._ends = []
+        for start, end in ranges:
+            self.add(start, end)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __iter__(self):
+        return iter(zip(self._starts, self._ends))
+
+    def __getitem__(self, position):
+        return self._starts[position], self._ends[position]
+
+    def overlapping(self, start, end):
+        """Posições das faixas que cruzam o intervalo [start, end)."""
+        first = bisect_right(self._ends, start)
+        last = bisect_left(self._starts, end)
+        return range(first, last)
+
+    def owner(self, page):
+        """Posição da faixa que contém a página, ou None se ela estiver livre."""
+        position = bisect_right(self._starts, page) - 1
+        if position >= 0 and page < self._ends[position]:
+            return position
+        return None
+
+    def add(self, start, end, merge=False):
+        """Insere a faixa [start, end) e retorna sua posição.
+
+        Se ela cruzar faixas existentes, lança ``RangeOverlapError``; com
+        ``merge=True``, as faixas em conflito são unidas à nova.
+        """
+        if start >= end:
+            raise ValueError(f"Faixa vazia: {start+1} - {end}.")
+        conflicts = self.overlapping(start, end)
+        if conflicts:
+            if not merge:
+                raise RangeOverlapError(start, end, [self[p] for p in conflicts])
+            start = min(start, self._starts[conflicts.start])
+            end = max(end, self._ends[conflicts.stop - 1])
+            del self._starts[conflicts.start:conflicts.stop]
+            del self._ends[conflicts.start:conflicts.stop]
+        position = bisect_left(self._starts, start)
+        self._starts.insert(position, start)
+        self._ends.insert(position, end)
+        return position
+
+    def remove_at(self, position):
+        """Remove a faixa da posição indicada e a retorna."""
+        return self._starts.pop(position), self._ends.pop(position)
+
+    def clear(self):
+        """Remove todas as faixas."""
+        self._starts.clear()
+        self._ends.clear()
@@ -0,0 +1,350 @@
+"""Renderização sob demanda das páginas do PDF."""
+import heapq
+import threading
+from concurrent.futures import CancelledError
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from image_store import PageImageStore
+from profiling import PROFILER
+from worker_pool import default_pool_size, document_pool, submit_shard
+
+# Quantidade de páginas enviadas de uma vez a cada processo do pool
+SHARD_SIZE = 4
+
+# Tamanho da célula de thumbnail na grade; as páginas são renderizadas
+# diretamente nessa resolução
+THUMB_WIDTH = 150
+THUMB_HEIGHT = 200
+
+
+def default_workers():
+    """Número de processos de renderização (``CORTAR_RENDER_WORKERS``).
+
+    Um núcleo fica de fora, para a interface.
+    """
+    return default_pool_size("CORTAR_RENDER_WORKERS", reserve=1)
+
+
+def pixmap_to_image(pix):
+    """Converte um pixmap RGB do PyMuPDF em imagem PIL sem passar por PNG.
+
+    Os bytes de ``pix.samples`` são usados diretamente como buffer da imagem,
+    respeitando o ``stride`` de cada linha.
+    """
+    return Image.frombuffer(
+        "RGB", (pix.width, pix.height), pix.samples, "raw", "RGB", pix.stride, 1
+    )
+
+
+def render_pixmap(doc, index, scale_factor):
+    """Renderiza a página de índice ``index`` de ``doc`` como pixmap RGB."""
+    page = doc[index]
+    matrix = fitz.Matrix(scale_factor, scale_factor)
+    # Desabilita o canal alpha para reduzir uso de memória
+    return page.get_pixmap(matrix=matrix, alpha=False)
+
+
+def _warm_up():
+    """Tarefa vazia: termina assim que o processo do pool está pronto."""
+    return True
+
+
+def _render_shard(doc, shard):
+    """Renderiza um lote de páginas dentro de um processo do pool.
+
+    Retorna, para cada página, ``(índice, escala, largura, altura, stride,
+    pixels)``; em caso de erro, os pixels vêm como None.
+    """
+    results = []
+    for index, scale_factor in shard:
+        try:
+            pix = render_pixmap(doc, index, scale_factor)
+            results.append((index, scale_factor, pix.width, pix.height, pix.stride, pix.samples))
+        except Exception as e:
+            print(f"Erro ao carregar a página {index+1}: {e}")
+            results.append((index, scale_factor, 0, 0, 0, None))
+    return results
+
+
+def _placeholder():
+    """Imagem exibida no lugar de uma página que não pôde ser renderizada."""
+    return Image.new("RGB", (THUMB_WIDTH, THUMB_HEIGHT), color="grey")
+
+
+class RenderQueue:
+    """Fila de prioridade das páginas a renderizar.
+
+    Cada pedido substitui o anterior e incrementa ``generation``, o que
+    permite ao renderer perceber que o trabalho em andamento ficou obsoleto.
+    """
+
+    def __init__(self):
+        """Cria a fila vazia."""
+        self.generation = 0
+        self._heap = []
+
+    def __bool__(self):
+        return bool(self._heap)
+
+    def replace(self, groups):
+        """Substitui a fila pelos grupos de páginas informados.
+
+        O grupo de posição ``k`` recebe prioridade ``k`` (0 é a mais alta);
+        dentro de um grupo, a ordem recebida é mantida. Uma página repetida
+        fica com a prioridade mais alta em que aparece.
+        """
+        self.generation += 1
+        seen = set()
+        heap = []
+        for priority, pages in enumerate(groups):
+            for page in pages:
+                if page not in seen:
+                    seen.add(page)
+                    heap.append((priority, len(heap), page))
+        heapq.heapify(heap)
+        self._heap = heap
+
+    def pop(self):
+        """Remove e retorna a página de maior prioridade."""
+        return heapq.heappop(self._heap)[2]
+
+    def clear(self):
+        """Descarta todas as páginas pendentes."""
+        self.generation += 1
+        self._heap = []
+
+
+class PageRenderer:
+    """Rasteriza as páginas do PDF somente quando elas são solicitadas.
+
+    A renderização é coordenada por uma thread de fundo. Cada página pronta é
+    entregue através do callback ``on_page_ready(index, image)``, chamado a
+    partir dessa thread. Se um ``ThumbnailCache`` for informado, as páginas
+    já renderizadas em execuções anteriores são lidas do disco. As páginas
+    prontas ficam em um ``PageImageStore`` com orçamento de memória; as que
+    forem descartadas são renderizadas de novo quando voltarem a ser pedidas.
+
+    Com ``workers`` maior que 1, as páginas são divididas em lotes e
+    renderizadas em paralelo por um pool de processos, cada um com sua própria
+    cópia do documento aberta; os resultados são entregues na ordem em que
+    foram pedidos. Com ``workers`` igual a 1, ou se o pool falhar, tudo é
+    renderizado na própria thread de fundo.
+
+    Cada pedido substitui o anterior: páginas que deixaram de ser necessárias
+    saem da fila e os lotes do pool que ainda não começaram são cancelados.
+    """
+
+    def __init__(self, document, on_page_ready, cache=None, workers=None, store=None):
+        """Inicia a thread de renderização para o ``PDFDocument`` informado."""
+        self.document = document
+        self.on_page_ready = on_page_ready
+        self.cache = cache
+        self.workers = default_workers() if workers is None else max(1, workers)
+        # Um documento já conhecido tem o hash memorizado, e todas as páginas
+        # podem vir do cache desde a primeira
+        self.fingerprint = None
+        if cache is not None and cache.known_fingerprint(document.path) is not None:
+            self.fingerprint = document.fingerprint(cache.fingerprint)
+        # Páginas renderizadas antes de o hash do documento ficar pronto;
+        # são gravadas no cache assim que ele for conhecido
+        self._unsaved = {}
+        self.page_count = document.page_count
+        self.store = store if store is not None else PageImageStore()
+        self._queue = RenderQueue()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._pool = None
+        self._warm_up = []
+        if self.workers > 1:
+            self._pool = document_pool(document.path, self.workers)
+            # Iniciar os processos leva de meio segundo a alguns segundos;
+            # até lá, as páginas são renderizadas na thread de fundo
+            self._warm_up = [self._pool.submit(_warm_up) for _ in range(self.workers)]
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        if cache is not None and self.fingerprint is None:
+            # O hash de arquivos grandes é demorado: calcula-o em paralelo
+            # para não atrasar a exibição das primeiras páginas
+            threading.Thread(target=self._compute_fingerprint, daemon=True).start()
+
+    def request(self, groups):
+        """Define as páginas a renderizar, em grupos de prioridade decrescente.
+
+        Normalmente o primeiro grupo é a janela visível e os seguintes são as
+        páginas que o usuário provavelmente verá em seguida. Pedidos anteriores
+        que ainda não foram atendidos são descartados.
+        """
+        with self._condition:
+            self._queue.replace(
+                [i for i in pages if 0 <= i < self.page_count and i not in self.store]
+                for pages in groups
+            )
+            self._condition.notify()
+
+    def close(self):
+        """Interrompe a thread de renderização.
+
+        O documento não é fechado: ele pertence a quem criou o renderer.
+        """
+        with self._condition:
+            self._closed = True
+            self._queue.clear()
+            self._condition.notify()
+
+    def _run(self):
+        """Laço da thread de fundo: renderiza as páginas pendentes."""
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    break
+                generation = self._queue.generation
+                batch = self._take_batch()
+            self._process_batch(batch, generation)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _pool_ready(self):
+        """Indica se o pool pode ser usado, descartando-o se ele falhou ao iniciar."""
+        if self._pool is None:
+            return False
+        if self._warm_up:
+            if not all(future.done() for future in self._warm_up):
+                return False
+            try:
+                for future in self._warm_up:
+                    future.result()
+            except Exception as e:
+                print(f"Pool de renderização indisponível, usando uma única thread: {e}")
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                return False
+            finally:
+                self._warm_up = []
+        return True
+
+    def _take_batch(self):
+        """Retira da fila as próximas páginas a renderizar."""
+        size = self.workers * SHARD_SIZE if self._pool_ready() else 1
+        batch = []
+        while self._queue and len(batch) < size:
+            index = self._queue.pop()
+            if index not in self.store:
+                batch.append(index)
+        return batch
+
+    def _process_batch(self, batch, generation):
+        """Entrega as páginas do lote, lendo do cache ou renderizando."""
+        to_render = []
+        for index in batch:
+            try:
+                scale_factor = self._scale_for(index)
+            except Exception as e:
+                print(f"Erro ao carregar a página {index+1}: {e}")
+                self._deliver(index, _placeholder())
+                continue
+            with PROFILER.stage("cache_lookup", page=index):
+                img = self._load_cached(index, scale_factor)
+            if img is not None:
+                self._deliver(index, img)
+            else:
+                to_render.append((index, scale_factor))
+
+        if to_render and self._pool_ready():
+            try:
+                self._render_in_pool(to_render, generation)
+                return
+            except BrokenProcessPool as e:
+                print(f"Pool de renderização indisponível, usando uma única thread: {e}")
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                to_render = [(i, s) for i, s in to_render if i not in self.store]
+
+        for index, scale_factor in to_render:
+            try:
+                with PROFILER.stage("get_pixmap", page=index), self.document.lock:
+                    pix = render_pixmap(self.document.doc, index, scale_factor)
+                with PROFILER.stage("pixmap_to_image", page=index):
+                    img = pixmap_to_image(pix)
+            except Exception as e:
+                print(f"Erro ao carregar a página {index+1}: {e}")
+                self._deliver(index, _placeholder())
+                continue
+            self._save_to_cache(index, scale_factor, img)
+            self._deliver(index, img)
+
+    def _render_in_pool(self, to_render, generation):
+        """Distribui as páginas em lotes pelo pool e entrega na ordem pedida.
+
+        Se um novo pedido chegar (ou o renderer for fechado) no meio do
+        caminho, os lotes que ainda não começaram são cancelados; as páginas
+        que continuarem necessárias já estão de volta na fila.
+        """
+        shards = [to_render[i:i + SHARD_SIZE] for i in range(0, len(to_render), SHARD_SIZE)]
+        futures = [submit_shard(self._pool, _render_shard, shard) for shard in shards]
+        for future in futures:
+            if self._closed or self._queue.generation != generation:
+                for pending in futures:
+                    pending.cancel()
+            try:
+                with PROFILER.stage("pool_render_wait"):
+                    results = future.result()
+            except CancelledError:
+                continue
+            for index, scale_factor, width, height, stride, samples in results:
+                if samples is None:
+                    self._deliver(index, _placeholder())
+                    continue
+                img = Image.frombuffer("RGB", (width, height), samples, "raw", "RGB", stride, 1)
+                self._save_to_cache(index, scale_factor, img)
+                self._deliver(index, img)
+
+    def _deliver(self, index, img):
+        """Registra a página pronta e avisa o callback."""
+        self.store.put(index, img)
+        self.on_page_ready(index, img)
+
+    def _compute_fingerprint(self):
+        """Calcula o hash do documento e grava as páginas pendentes no cache."""
+        try:
+            # Guardado também no documento, para a divisão e o índice de texto
+            fingerprint = self.document.fingerprint(self.cache.fingerprint)
+        except OSError as e:
+            print(f"Erro ao calcular o hash do PDF: {e}")
+            return
+        with self._condition:
+            self.fingerprint = fingerprint
+            unsaved, self._unsaved = self._unsaved, {}
+        for (index, scale), img in unsaved.items():
+            self.cache.put(fingerprint, index, scale, img)
+
+    def _load_cached(self, index, scale_factor):
+        """Obtém a página do cache em disco, ou None se ela não estiver lá."""
+        if self.cache is None:
+            return None
+        fingerprint = self.fingerprint
+        if fingerprint is None:
+            self.cache.record_miss()
+            return None
+        return self.cache.get(fingerprint, index, scale_factor)
+
+    def _save_to_cache(self, index, scale_factor, img):
+        """Grava uma página recém-renderizada no cache em disco."""
+        if self.cache is None:
+            return
+        with self._condition:
+            fingerprint = self.fingerprint
+            if fingerprint is None:
+                self._unsaved[(index, scale_factor)] = img
+        if fingerprint is not None:
+            with PROFILER.stage("cache_store", page=index):
+                self.cache.put(fingerprint, index, scale_factor, img)
+
+    def _scale_for(self, index):
+        """Fator de escala que faz a página caber exatamente na célula do thumbnail."""
+        rect = self.document.page_rect(index)
+        return min(THUMB_WIDTH / rect.width, THUMB_HEIGHT / rect.height)
@@ -0,0 +1,92 @@
+"""Estimativa do tamanho de uma parte, sem gravá-la.
+
+Cada página custa os objetos que ela referencia (o próprio objeto da
+página, os fluxos de conteúdo, imagens, fontes e demais recursos), e um
+objeto compartilhado por várias páginas é contado uma única vez por parte,
+como acontece no arquivo gravado sem otimização. Cada objeto do documento é
+lido uma única vez.
+"""
+import re
+
+# Custo fixo de um arquivo gerado (cabeçalho, catálogo, árvore de páginas,
+# trailer)
+PART_OVERHEAD_BYTES = 1024
+
+# Custo de cada objeto além do seu conteúdo ("N 0 obj ... endobj", fluxo e
+# entrada na tabela xref)
+OBJECT_OVERHEAD_BYTES = 56
+
+_REFERENCE = re.compile(r"(\d+) 0 R")
+_LENGTH = re.compile(r"/Length\s+(\d+)(\s+0 R)?")
+# A página aponta para a árvore de páginas, que não faz parte dos seus recursos
+_PARENT = re.compile(r"/Parent\s+\d+ 0 R")
+
+
+class SizeEstimator:
+    """Estima quantos bytes cada página acrescenta a uma parte."""
+
+    def __init__(self, doc):
+        """Prepara a estimativa para o documento PyMuPDF ``doc``."""
+        self.doc = doc
+        # Outras páginas (citadas em links e anotações) não entram nos
+        # recursos de uma página
+        self._page_xrefs = {doc.page_xref(i) for i in range(len(doc))}
+        self._objects = {}  # xref -> (tamanho, xrefs referenciados)
+
+    def _object(self, xref):
+        """Tamanho e referências do objeto ``xref``, lidos uma única vez."""
+        info = self._objects.get(xref)
+        if info is None:
+            try:
+                # O objeto é lido no mesmo formato usado ao gravar as partes
+                source = self.doc.xref_object(xref)
+                size = len(source) + OBJECT_OVERHEAD_BYTES
+                # Só dicionários com /Length podem ter fluxo; evitar consultar
+                # os demais poupa uma chamada ao PyMuPDF por objeto
+                if "/Length" in source and self.doc.xref_is_stream(xref):
+                    size += self._stream_length(xref, source)
+            except Exception:
+                # Objeto ausente ou corrompido: não é copiado para a parte
+                source, size = "", 0
+            children = {int(ref) for ref in _REFERENCE.findall(_PARENT.sub("", source))}
+            info = (size, tuple(children - self._page_xrefs))
+            self._objects[xref] = info
+        return info
+
+    def _stream_length(self, xref, source):
+        """Tamanho do fluxo do objeto, como gravado no arquivo."""
+        match = _LENGTH.search(source)
+        if match is None:
+            return len(self.doc.xref_stream_raw(xref))
+        if match.group(2):
+            # Tamanho guardado em outro objeto ("/Length 12 0 R")
+            return int(self.doc.xref_object(int(match.group(1))))
+        return int(match.group(1))
+
+    def page_cost(self, index, included):
+        """Bytes acrescentados pela página a uma parte que já contém ``included``.
+
+        Retorna ``(bytes, xrefs novos)``; ``included`` não é alterado.
+        """
+        root = self.doc.page_xref(index)
+        new = {root}
+        pending = [root]
+        total = 0
+        while pending:
+            size, children = self._object(pending.pop())
+            total += size
+            for child in children:
+                if child not in included and child not in new:
+                    new.add(child)
+                    pending.append(child)
+        return total, new
+
+    def range_cost(self, start, end):
+        """Tamanho estimado, em bytes, de uma parte com as páginas [start, end)."""
+        included = set()
+        total = PART_OVERHEAD_BYTES
+        for index in range(start, end):
+            cost, new = self.page_cost(index, included)
+            included |= new
+            total += cost
+        return total
@@ -0,0 +1,77 @@
+"""Divisão de um PDF em partes consecutivas abaixo de um tamanho máximo.
+
+O tamanho de cada parte é estimado sem gravá-la (ver ``size_estimate``), e
+as partes são formadas em uma só passada pelas páginas.
+"""
+import os
+
+from document import PDFDocument
+from profiling import PROFILER
+from size_estimate import PART_OVERHEAD_BYTES, SizeEstimator
+from splitter import split_pdf
+
+# Quantidade de páginas analisadas a cada vez que o documento é bloqueado
+PAGES_PER_LOCK = 256
+
+
+def plan_size_ranges(document, max_bytes, on_progress=None):
+    """Divide ``document`` em faixas consecutivas de até ``max_bytes`` cada.
+
+    ``document`` é um ``PDFDocument``. As páginas são acumuladas na parte
+    atual enquanto a estimativa couber no limite; uma página que sozinha
+    já o ultrapassa forma uma parte própria. ``on_progress(concluídas,
+    total)`` é chamado periodicamente. Retorna as faixas [início, fim).
+    """
+    total = document.page_count
+    ranges = []
+    start = 0
+    included = set()
+    part_bytes = PART_OVERHEAD_BYTES
+    with document.lock:
+        estimator = SizeEstimator(document.doc)
+    with PROFILER.stage("plan_size_ranges", pages=total):
+        for chunk_start in range(0, total, PAGES_PER_LOCK):
+            with document.lock:
+                for index in range(chunk_start, min(chunk_start + PAGES_PER_LOCK, total)):
+                    cost, new = estimator.page_cost(index, included)
+                    if index > start and part_bytes + cost > max_bytes:
+                        ranges.append((start, index))
+                        start = index
+                        included = set()
+                        part_bytes = PART_OVERHEAD_BYTES
+                        cost, new = estimator.page_cost(index, included)
+                    included |= new
+                    part_bytes += cost
+            if on_progress is not None:
+                on_progress(min(chunk_start + PAGES_PER_LOCK, total), total)
+    if total:
+        ranges.append((start, total))
+    return ranges
+
+
+def split_file_by_size(pdf_path, max_bytes, output_dir, workers=None, optimize=False,
+                       on_part_written=None, resume=False, document=None):
+    """Abre ``pdf_path`` e o divide em partes de até ``max_bytes`` cada.
+
+    ``optimize``, ``on_part_written`` e ``resume`` são repassados a ``split_pdf``; a
+    estimativa não considera a otimização, de modo que partes otimizadas
+    ficam abaixo do limite com folga. ``document`` é tratado como em
+    ``splitter.split_file``. Retorna ``(caminhos gerados, caminhos acima do
+    limite)``; uma parte só fica acima do limite se tiver uma página maior
+    que ele ou se a estimativa falhar.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    owned = document is None
+    if owned:
+        document = PDFDocument(pdf_path)
+    try:
+        ranges = plan_size_ranges(document, max_bytes)
+        paths = split_pdf(
+            document, ranges, output_dir, workers=workers,
+            optimize=optimize, on_part_written=on_part_written, resume=resume,
+        )
+    finally:
+        if owned:
+            document.close()
+    oversized = [path for path in paths if os.path.getsize(path) > max_bytes]
+    return paths, oversized
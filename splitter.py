@@ -0,0 +1,427 @@
+"""Divisão de um PDF em várias partes, em paralelo."""
+import hashlib
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from functools import partial
+
+import fitz  # PyMuPDF
+
+from document import PDFDocument
+from job_manifest import SplitJob
+from profiling import PROFILER
+from size_estimate import SizeEstimator
+from worker_pool import default_pool_size, map_shards
+
+# Abaixo desta quantidade de partes, o custo de iniciar o pool de processos
+# não compensa e a divisão é feita no próprio processo
+PARALLEL_MIN_PARTS = 8
+
+# Opções de gravação do modo otimizado: remove objetos sem uso e unifica os
+# idênticos, inclusive fluxos (garbage=4), limpa os fluxos de conteúdo e
+# descarta recursos não usados pelas páginas (clean), comprime os fluxos
+# (deflate) e agrupa os objetos em fluxos de objetos comprimidos, com tabela
+# de referências também em fluxo (use_objstms)
+OPTIMIZED_SAVE_OPTIONS = {"garbage": 4, "clean": 1, "deflate": 1, "use_objstms": 1}
+
+# Partes já montadas que podem aguardar a gravação na pasta de saída; limita
+# o espaço de preparo usado quando o disco (ou a pasta de rede) é mais lento
+# que a montagem das partes
+WRITE_QUEUE_PARTS = 4
+
+# Tamanho dos blocos lidos ao copiar uma parte e calcular seu checksum
+COPY_CHUNK_BYTES = 1 << 20
+
+
+def default_split_workers():
+    """Número de processos usados para gravar as partes (``CORTAR_SPLIT_WORKERS``)."""
+    return default_pool_size("CORTAR_SPLIT_WORKERS")
+
+
+def output_paths(pdf_path, count, output_dir):
+    """Define o caminho de saída de cada uma das ``count`` partes.
+
+    Os arquivos se chamam ``Parte_{número}_<nome_original>.pdf``; se o nome já
+    existir, é acrescentado um contador: ``Parte_{número}_{contador}_...``.
+
+    Os nomes existentes vêm de uma única listagem da pasta, em vez de uma
+    consulta ao sistema de arquivos por nome tentado, o que em pastas de rede
+    com milhares de arquivos custaria uma ida e volta ao servidor cada. A
+    comparação ignora maiúsculas, como nos sistemas de arquivos do Windows.
+    """
+    base, ext = os.path.splitext(os.path.basename(pdf_path))
+    try:
+        existing = {name.casefold() for name in os.listdir(output_dir)}
+    except FileNotFoundError:
+        existing = set()
+    paths = []
+    for idx in range(count):
+        proposed_name = f"Parte_{idx+1}_{base}{ext}"
+        counter = 1
+        while proposed_name.casefold() in existing:
+            proposed_name = f"Parte_{idx+1}_{counter}_{base}{ext}"
+            counter += 1
+        existing.add(proposed_name.casefold())
+        paths.append(os.path.join(output_dir, proposed_name))
+    return paths
+
+
+def parse_ranges(spec, page_count):
+    """Converte uma especificação de faixas em intervalos [início, fim).
+
+    ``spec`` pode ser um texto como ``"1-3,4-10,11,12-"`` (páginas numeradas
+    a partir de 1, extremos inclusivos, ``"12-"`` indo até a última página)
+    ou uma lista de pares ``[primeira, última]`` na mesma numeração.
+    """
+    if isinstance(spec, str):
+        items = []
+        for item in spec.split(","):
+            item = item.strip()
+            if not item:
+                continue
+            first, sep, last = item.partition("-")
+            first = int(first) if first.strip() else 1
+            if sep:
+                last = int(last) if last.strip() else page_count
+            else:
+                last = first
+            items.append((first, last))
+    else:
+        items = [(int(first), int(last)) for first, last in spec]
+
+    if not items:
+        raise ValueError("Nenhuma faixa de páginas foi informada.")
+    ranges = []
+    for first, last in items:
+        if not 1 <= first <= last <= page_count:
+            raise ValueError(
+                f"Faixa inválida: {first}-{last} (o documento tem {page_count} páginas)."
+            )
+        ranges.append((first - 1, last))
+    return ranges
+
+
+def save_part(doc, start, end, filename, optimize=False):
+    """Monta o PDF com as páginas [start, end) de ``doc`` e o grava em ``filename``.
+
+    Com ``optimize``, o arquivo é gravado com ``OPTIMIZED_SAVE_OPTIONS``: fica
+    menor, mas a gravação é mais lenta.
+    """
+    part = fitz.open()
+    try:
+        part.insert_pdf(doc, from_page=start, to_page=end - 1)
+        part.save(filename, **(OPTIMIZED_SAVE_OPTIONS if optimize else {}))
+    finally:
+        part.close()
+
+
+class PartWriter:
+    """Conclui em uma thread própria a gravação das partes já montadas.
+
+    Quem monta as partes as grava primeiro em um arquivo de preparo (ver
+    ``staging_path``) e as entrega com ``put``; esta thread as leva ao nome
+    final, calculando o checksum se pedido. Quando a pasta de saída fica em
+    outro dispositivo que a pasta temporária (por exemplo, uma pasta de
+    rede), o preparo é feito no disco local e a cópia para a pasta de saída
+    acontece aqui, ao mesmo tempo em que a parte seguinte é montada. Na
+    mesma unidade, a parte é preparada já na pasta de saída e apenas
+    renomeada.
+
+    A fila é limitada a ``WRITE_QUEUE_PARTS`` partes: se a pasta de saída não
+    acompanhar, ``put`` espera, em vez de acumular arquivos de preparo.
+    """
+
+    def __init__(self, output_dir, checksum=False):
+        """Inicia a thread; com ``checksum``, calcula o hash de cada parte."""
+        self.checksum = checksum
+        self.staging_dir = None
+        staging_root = tempfile.gettempdir()
+        try:
+            if os.stat(staging_root).st_dev != os.stat(output_dir).st_dev:
+                self.staging_dir = tempfile.mkdtemp(prefix="cortar-", dir=staging_root)
+        except OSError:
+            pass
+        self._queue = queue.Queue(maxsize=WRITE_QUEUE_PARTS)
+        self._finished = queue.Queue()  # Relatórios das partes já gravadas
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="PartWriter", daemon=True)
+        self._thread.start()
+
+    def staging_path(self, output_filename):
+        """Arquivo onde a parte destinada a ``output_filename`` deve ser montada."""
+        if self.staging_dir is None:
+            return output_filename + ".tmp"
+        return os.path.join(self.staging_dir, os.path.basename(output_filename))
+
+    def put(self, report):
+        """Enfileira a conclusão da parte de ``report`` (ver ``split_pdf``).
+
+        A parte já deve estar em ``staging_path(report["path"])``; o relatório
+        é completado com o tamanho e o tempo de gravação. Um erro de uma
+        gravação anterior é lançado aqui.
+        """
+        if self._error is not None:
+            raise self._error
+        self._queue.put(report)
+
+    def completed(self):
+        """Retorna os relatórios das partes concluídas desde a última chamada."""
+        reports = []
+        while True:
+            try:
+                reports.append(self._finished.get_nowait())
+            except queue.Empty:
+                return reports
+
+    def close(self):
+        """Espera as gravações pendentes e lança o erro de alguma delas, se houver."""
+        self._queue.put(None)
+        self._thread.join()
+        if self.staging_dir is not None:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        """Laço da thread de gravação."""
+        while True:
+            report = self._queue.get()
+            if report is None:
+                return
+            if self._error is not None:
+                continue  # Descarta o restante após um erro
+            began = time.perf_counter()
+            try:
+                with PROFILER.stage("finish_part", part=report["part"]):
+                    size, checksum = self._finish(report["path"])
+            except Exception as e:
+                self._error = e
+                continue
+            report["bytes"] = size
+            report["seconds"] = round(report["seconds"] + time.perf_counter() - began, 4)
+            if self.checksum:
+                report["checksum"] = checksum
+            self._finished.put(report)
+
+    def _finish(self, output_filename):
+        """Leva a parte ao nome final; retorna seu tamanho e checksum."""
+        staged = self.staging_path(output_filename)
+        tmp_filename = output_filename + ".tmp"
+        digest = hashlib.blake2b(digest_size=16)  # O mesmo de file_fingerprint
+        size = 0
+        if staged != tmp_filename:
+            with open(staged, "rb") as src, open(tmp_filename, "wb") as dst:
+                for chunk in iter(lambda: src.read(COPY_CHUNK_BYTES), b""):
+                    dst.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            os.remove(staged)
+        else:
+            size = os.path.getsize(tmp_filename)
+            if self.checksum:
+                with open(tmp_filename, "rb") as f:
+                    for chunk in iter(lambda: f.read(COPY_CHUNK_BYTES), b""):
+                        digest.update(chunk)
+        os.replace(tmp_filename, output_filename)
+        return size, digest.hexdigest()
+
+
+def _save_for_writer(doc, writer, idx, start, end, output_filename, optimize, estimator=None):
+    """Monta uma parte no arquivo de preparo do ``writer`` e retorna seu relatório.
+
+    Com ``estimator`` (um ``SizeEstimator`` de ``doc``), o relatório inclui o
+    tamanho estimado da parte sem otimização, para comparação.
+    """
+    baseline = estimator.range_cost(start, end) if estimator is not None else None
+    began = time.perf_counter()
+    save_part(doc, start, end, writer.staging_path(output_filename), optimize)
+    return {
+        "part": idx + 1,
+        "path": output_filename,
+        "pages": end - start,
+        "bytes": 0,
+        # O tempo de conclusão da gravação é somado pelo PartWriter
+        "seconds": time.perf_counter() - began,
+        "optimized": optimize,
+        "baseline_bytes": baseline,
+        "skipped": False,
+    }
+
+
+def _write_parts_task(doc, tasks, output_dir, optimize, checksum):
+    """Grava um lote de partes dentro de um processo do pool.
+
+    Cada processo também tem seu ``PartWriter``, para que a montagem de uma
+    parte e a gravação da anterior aconteçam ao mesmo tempo.
+    """
+    writer = PartWriter(output_dir, checksum)
+    estimator = SizeEstimator(doc) if optimize else None
+    try:
+        for idx, start, end, output_filename in tasks:
+            writer.put(_save_for_writer(
+                doc, writer, idx, start, end, output_filename, optimize, estimator
+            ))
+    finally:
+        writer.close()
+    return writer.completed()
+
+
+def split_pdf(document, ranges, output_dir, workers=None, on_progress=None,
+              optimize=False, on_part_written=None, resume=False, verify=False):
+    """Grava uma parte para cada faixa [início, fim) de ``ranges``.
+
+    ``document`` é um ``PDFDocument`` aberto. As partes são independentes e,
+    havendo várias, são gravadas em paralelo por um pool de processos, cada
+    um com sua própria cópia do documento. ``on_progress(concluídas, total)``
+    é chamado a cada parte gravada. Com ``optimize``, as partes são gravadas
+    compactadas (ver ``save_part`` e ``OPTIMIZED_SAVE_OPTIONS``).
+
+    Com ``resume``, o trabalho é registrado em um diário na pasta de saída
+    (ver ``job_manifest.SplitJob``): repetir a mesma divisão reaproveita os
+    nomes das partes e só grava as que faltam ou não conferem com o diário,
+    em vez de criar cópias ``Parte_N_1_...``. As partes já gravadas são
+    conferidas pelo tamanho e pela data de modificação; com ``verify``,
+    também pelo checksum do conteúdo (ver ``SplitJob.is_complete``). Um
+    arquivo que ocupe o nome reservado sem conferir com o diário (de outro
+    PDF com o mesmo nome ou alterado depois da divisão) nunca é
+    sobrescrito: a parte recebe um nome novo.
+
+    ``on_part_written(relatório)`` recebe, para cada parte e na ordem em que
+    forem concluídas, um dicionário com o número da parte (``part``), o
+    caminho (``path``), a quantidade de páginas (``pages``), o tamanho em
+    bytes (``bytes``), o tempo de gravação em segundos (``seconds``), se
+    ela foi otimizada (``optimized``) e se já estava gravada (``skipped``).
+    Partes otimizadas trazem também o tamanho estimado da mesma parte sem
+    otimização (``baseline_bytes``, ver ``size_estimate``); nas demais, ele é
+    None.
+
+    Retorna os caminhos gerados, na ordem das faixas.
+    """
+    total = len(ranges)
+    job = None
+    with PROFILER.stage("resolve_output_names", parts=total):
+        if resume:
+            job = SplitJob.open(
+                document.path, ranges, output_dir, optimize,
+                lambda: output_paths(document.path, total, output_dir),
+                fingerprint=document.fingerprint(),
+            )
+            paths = job.paths
+        else:
+            paths = output_paths(document.path, total, output_dir)
+    pending = list(range(total))
+    done = 0
+    if job is not None:
+        with PROFILER.stage("verify_completed_parts", parts=len(job.completed)):
+            pending = [idx for idx in pending if not job.is_complete(idx, verify)]
+        # Um arquivo no nome reservado que não confere com o diário é de outra
+        # divisão (por exemplo, de outro PDF com o mesmo nome) ou foi alterado
+        # depois de gravado; ele é mantido, e a parte recebe um nome novo
+        taken = [idx for idx in pending if os.path.lexists(paths[idx])]
+        if taken:
+            fresh = output_paths(document.path, total, output_dir)
+            job.reassign({idx: fresh[idx] for idx in taken})
+        done = total - len(pending)
+        if on_part_written is not None:
+            for idx in sorted(set(range(total)) - set(pending)):
+                start, end = ranges[idx]
+                on_part_written({
+                    "part": idx + 1, "path": paths[idx], "pages": end - start,
+                    "bytes": job.completed[idx]["bytes"], "seconds": 0.0,
+                    "optimized": optimize,
+                    "baseline_bytes": job.completed[idx].get("baseline_bytes"),
+                    "skipped": True,
+                })
+        if on_progress is not None and done:
+            on_progress(done, total)
+
+    def finish(reports):
+        nonlocal done
+        # O diário é atualizado antes dos callbacks, para que uma interrupção
+        # dentro deles não deixe partes gravadas sem registro
+        if job is not None:
+            for report in reports:
+                job.record(report)
+        if on_part_written is not None:
+            for report in reports:
+                on_part_written(report)
+        done += len(reports)
+        if reports and on_progress is not None:
+            on_progress(done, total)
+
+    workers = default_split_workers() if workers is None else max(1, workers)
+    workers = min(workers, len(pending))
+    try:
+        if workers <= 1 or len(pending) < PARALLEL_MIN_PARTS:
+            # A montagem das partes (nesta thread) e a gravação em disco (no
+            # PartWriter) acontecem ao mesmo tempo
+            writer = PartWriter(output_dir, checksum=job is not None)
+            estimator = None
+            if optimize:
+                with document.lock:
+                    estimator = SizeEstimator(document.doc)
+            try:
+                for idx in pending:
+                    start, end = ranges[idx]
+                    with PROFILER.stage("write_part", part=idx + 1, pages=end - start), document.lock:
+                        report = _save_for_writer(
+                            document.doc, writer, idx, start, end, paths[idx], optimize, estimator
+                        )
+                    writer.put(report)
+                    finish(writer.completed())
+            except BaseException:
+                try:
+                    writer.close()
+                except Exception:
+                    pass  # Prevalece o erro que interrompeu a divisão
+                # As partes que o PartWriter concluiu também vão para o diário,
+                # para que a retomada as reconheça em vez de renomeá-las
+                if job is not None:
+                    for report in writer.completed():
+                        job.record(report)
+                raise
+            writer.close()
+            finish(writer.completed())
+            return paths
+
+        tasks = [(idx, *ranges[idx], paths[idx]) for idx in pending]
+        # As partes são enviadas em lotes para diluir o custo de comunicação com
+        # o pool, mantendo lotes suficientes para um progresso contínuo
+        chunk_size = max(1, len(tasks) // (workers * 8))
+        chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+        task = partial(
+            _write_parts_task, output_dir=output_dir, optimize=optimize, checksum=job is not None
+        )
+        map_shards(document, task, chunks, workers, finish, "write_parts")
+        return paths
+    finally:
+        if job is not None:
+            job.close()
+
+
+def split_file(pdf_path, spec, output_dir, workers=None, optimize=False, on_part_written=None,
+               resume=False, document=None):
+    """Abre ``pdf_path``, interpreta ``spec`` (ver ``parse_ranges``) e o divide.
+
+    ``optimize``, ``on_part_written`` e ``resume`` são repassados a ``split_pdf``.
+    Com ``document`` (um ``PDFDocument`` de ``pdf_path`` já aberto), o arquivo
+    não é reaberto, e o documento continua aberto ao final. Retorna os
+    caminhos das partes geradas.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    owned = document is None
+    if owned:
+        document = PDFDocument(pdf_path)
+    try:
+        ranges = parse_ranges(spec, document.page_count)
+        return split_pdf(
+            document, ranges, output_dir, workers=workers,
+            optimize=optimize, on_part_written=on_part_written, resume=resume,
+        )
+    finally:
+        if owned:
+            document.close()
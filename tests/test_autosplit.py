@@ -0,0 +1,23 @@
+from autosplit import ranges_between, ranges_from_starts
+
+
+def test_ranges_between_skips_separators():
+    separators = [False, False, True, False, True, True, False]
+    assert ranges_between(separators) == [(0, 2), (3, 4), (6, 7)]
+
+
+def test_ranges_between_edges():
+    assert ranges_between([True, False, False, True]) == [(1, 3)]
+    assert ranges_between([True, True]) == []
+    assert ranges_between([False] * 3) == [(0, 3)]
+    assert ranges_between([]) == []
+
+
+def test_ranges_from_starts_covers_every_page():
+    assert ranges_from_starts([2, 5], 8) == [(0, 2), (2, 5), (5, 8)]
+    assert ranges_from_starts([0, 5], 8) == [(0, 5), (5, 8)]
+
+
+def test_ranges_from_starts_ignores_duplicates_and_out_of_bounds():
+    assert ranges_from_starts([5, 0, 5, -1, 8], 8) == [(0, 5), (5, 8)]
+    assert ranges_from_starts([], 8) == []
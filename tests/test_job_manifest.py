@@ -0,0 +1,90 @@
+import os
+
+from document import file_fingerprint
+from job_manifest import SplitJob, job_key
+
+RANGES = [(0, 2), (2, 4)]
+
+
+def open_job(tmp_path, ranges=RANGES):
+    return SplitJob.open(
+        str(tmp_path / "origem.pdf"), ranges, str(tmp_path), False,
+        lambda: [str(tmp_path / f"Parte_{i+1}.pdf") for i in range(len(ranges))],
+        fingerprint="abc",
+    )
+
+
+def write_part(job, idx, content):
+    """Grava a parte ``idx`` e a registra no diário, como faz ``split_pdf``."""
+    path = job.paths[idx]
+    with open(path, "wb") as f:
+        f.write(content)
+    job.record({
+        "part": idx + 1, "path": path, "bytes": len(content),
+        "checksum": file_fingerprint(path),
+    })
+
+
+def test_job_key_depends_on_content_ranges_and_options():
+    key = job_key("abc", RANGES, False)
+    assert key == job_key("abc", [list(r) for r in RANGES], False)
+    assert key != job_key("abd", RANGES, False)
+    assert key != job_key("abc", RANGES[:1], False)
+    assert key != job_key("abc", RANGES, True)
+
+
+def test_reopen_resumes_completed_parts(tmp_path):
+    job = open_job(tmp_path)
+    write_part(job, 0, b"parte um")
+    job.close()
+
+    resumed = open_job(tmp_path)
+    assert resumed.paths == job.paths
+    assert resumed.is_complete(0)
+    assert not resumed.is_complete(1)
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    job = open_job(tmp_path)
+    write_part(job, 0, b"parte um")
+    job.close()
+    with open(job.path, "a", encoding="utf-8") as f:
+        f.write('{"part": 2, "by')  # Queda no meio da gravação
+
+    resumed = open_job(tmp_path)
+    assert set(resumed.completed) == {0}
+    write_part(resumed, 1, b"parte dois")
+    resumed.close()
+    assert set(open_job(tmp_path).completed) == {0, 1}
+
+
+def test_changed_part_is_not_complete(tmp_path):
+    job = open_job(tmp_path)
+    write_part(job, 0, b"parte um")
+    job.close()
+
+    with open(job.paths[0], "ab") as f:
+        f.write(b"!")
+    assert not open_job(tmp_path).is_complete(0)
+
+
+def test_verify_compares_checksum(tmp_path):
+    job = open_job(tmp_path)
+    write_part(job, 0, b"parte um")
+    job.close()
+
+    # Mesmo tamanho e mesma data de modificação, conteúdo diferente
+    stat = os.stat(job.paths[0])
+    with open(job.paths[0], "wb") as f:
+        f.write(b"parte 1!")
+    os.utime(job.paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    resumed = open_job(tmp_path)
+    assert resumed.is_complete(0)
+    assert not resumed.is_complete(0, verify=True)
+
+
+def test_other_ranges_start_a_new_job(tmp_path):
+    job = open_job(tmp_path)
+    write_part(job, 0, b"parte um")
+    job.close()
+    assert open_job(tmp_path, RANGES[:1]).completed == {}
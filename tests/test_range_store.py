@@ -0,0 +1,56 @@
+import pytest
+
+from range_store import RangeOverlapError, RangeStore
+
+
+def test_add_keeps_page_order_and_returns_position():
+    store = RangeStore()
+    assert store.add(10, 20) == 0
+    assert store.add(0, 5) == 0
+    assert store.add(30, 40) == 2
+    assert store.add(20, 30) == 2  # Encosta nas vizinhas sem cruzá-las
+    assert list(store) == [(0, 5), (10, 20), (20, 30), (30, 40)]
+
+
+def test_overlapping_finds_only_crossing_ranges():
+    store = RangeStore([(0, 5), (10, 20), (30, 40)])
+    assert list(store.overlapping(5, 10)) == []
+    assert list(store.overlapping(4, 11)) == [0, 1]
+    assert list(store.overlapping(15, 35)) == [1, 2]
+    assert list(store.overlapping(40, 50)) == []
+
+
+def test_owner():
+    store = RangeStore([(0, 5), (10, 20)])
+    assert store.owner(0) == 0
+    assert store.owner(4) == 0
+    assert store.owner(5) is None
+    assert store.owner(19) == 1
+    assert store.owner(20) is None
+
+
+def test_overlap_raises_and_leaves_store_unchanged():
+    store = RangeStore([(0, 5), (10, 20)])
+    with pytest.raises(RangeOverlapError) as info:
+        store.add(3, 12)
+    assert info.value.conflicts == [(0, 5), (10, 20)]
+    assert list(store) == [(0, 5), (10, 20)]
+
+
+def test_merge_joins_conflicting_ranges():
+    store = RangeStore([(0, 5), (10, 20), (30, 40)])
+    assert store.add(3, 12, merge=True) == 0
+    assert list(store) == [(0, 20), (30, 40)]
+
+
+def test_empty_range_is_rejected():
+    with pytest.raises(ValueError):
+        RangeStore().add(5, 5)
+
+
+def test_remove_at_and_clear():
+    store = RangeStore([(0, 5), (10, 20)])
+    assert store.remove_at(0) == (0, 5)
+    assert list(store) == [(10, 20)]
+    store.clear()
+    assert len(store) == 0
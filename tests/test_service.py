@@ -0,0 +1,69 @@
+import http.client
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from cortar_service import ServiceRequestHandler, SplitService
+
+
+@pytest.fixture
+def server(tmp_path):
+    service = SplitService(workers=1)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ServiceRequestHandler)
+    server.service = service
+    server.output_dir = str(tmp_path / "saida")
+    server.spool_dir = str(tmp_path)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def request(server, method, path, body=None, headers=None):
+    port = server.server_address[1]
+    headers = dict({"Host": f"127.0.0.1:{port}"}, **(headers or {}))
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    try:
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+JOB = json.dumps({"input": "inexistente.pdf", "ranges": "1-"})
+
+
+def test_json_job_is_accepted(server):
+    status, data = request(server, "POST", "/jobs", JOB, {"Content-Type": "application/json"})
+    assert status == 202 and data["jobs"] == [1]
+
+
+@pytest.mark.parametrize("content_type", [None, "text/plain", "application/x-www-form-urlencoded"])
+def test_other_content_types_are_rejected(server, content_type):
+    headers = {"Content-Type": content_type} if content_type else {}
+    status, _ = request(server, "POST", "/jobs", JOB, headers)
+    assert status == 415
+    assert server.service.jobs() == []
+
+
+def test_pdf_content_type_requires_a_pdf_body(server):
+    status, _ = request(server, "POST", "/jobs", JOB, {"Content-Type": "application/pdf"})
+    assert status == 400
+
+
+@pytest.mark.parametrize("host", ["exemplo.com", "exemplo.com:{port}", "127.0.0.1:1"])
+def test_foreign_host_is_rejected(server, host):
+    headers = {"Host": host.format(port=server.server_address[1])}
+    assert request(server, "GET", "/jobs", headers=headers)[0] == 403
+    headers["Content-Type"] = "application/json"
+    assert request(server, "POST", "/jobs", JOB, headers)[0] == 403
+
+
+def test_localhost_is_accepted(server):
+    headers = {"Host": f"localhost:{server.server_address[1]}"}
+    assert request(server, "GET", "/status", headers=headers)[0] == 200
@@ -0,0 +1,149 @@
+import os
+
+import fitz  # PyMuPDF
+import pytest
+
+from document import PDFDocument
+from splitter import output_paths, parse_ranges, split_pdf
+
+
+def test_parse_ranges_text():
+    assert parse_ranges("1-3, 4-10,11", 20) == [(0, 3), (3, 10), (10, 11)]
+
+
+def test_parse_ranges_open_ended():
+    assert parse_ranges("12-", 20) == [(11, 20)]
+    assert parse_ranges("-3", 20) == [(0, 3)]
+
+
+def test_parse_ranges_pairs():
+    assert parse_ranges([[1, 2], ["3", "5"]], 5) == [(0, 2), (2, 5)]
+
+
+@pytest.mark.parametrize("spec", ["5-3", "0-2", "1-21", "21", "", " , "])
+def test_parse_ranges_rejects_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_ranges(spec, 20)
+
+
+def test_output_paths_numbers_parts(tmp_path):
+    paths = output_paths("/origem/relatorio.pdf", 2, str(tmp_path))
+    assert [os.path.basename(p) for p in paths] == [
+        "Parte_1_relatorio.pdf", "Parte_2_relatorio.pdf",
+    ]
+
+
+def test_output_paths_avoids_existing_names_ignoring_case(tmp_path):
+    (tmp_path / "PARTE_1_relatorio.pdf").touch()
+    (tmp_path / "Parte_1_1_relatorio.pdf").touch()
+    paths = output_paths("relatorio.pdf", 2, str(tmp_path))
+    assert [os.path.basename(p) for p in paths] == [
+        "Parte_1_2_relatorio.pdf", "Parte_2_relatorio.pdf",
+    ]
+
+
+def test_output_paths_missing_directory(tmp_path):
+    paths = output_paths("relatorio.pdf", 1, str(tmp_path / "nova"))
+    assert os.path.basename(paths[0]) == "Parte_1_relatorio.pdf"
+
+
+def make_pdf(path, pages, label):
+    """Gera um PDF com ``pages`` páginas identificadas por ``label``."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"{label} {i+1}")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def split(pdf_path, ranges, output_dir, **options):
+    """Divide com diário, em um único processo, e retorna os relatórios por parte."""
+    reports = []
+    document = PDFDocument(pdf_path)
+    try:
+        split_pdf(
+            document, ranges, output_dir, workers=1, resume=True,
+            on_part_written=reports.append, **options
+        )
+    finally:
+        document.close()
+    return sorted(reports, key=lambda report: report["part"])
+
+
+def page_count(path):
+    with fitz.open(path) as doc:
+        return len(doc)
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class Interrupted(Exception):
+    pass
+
+
+def test_resume_after_interruption(tmp_path):
+    pdf = make_pdf(str(tmp_path / "origem" / "relatorio.pdf"), 40, "A")
+    out = str(tmp_path / "saida")
+    os.makedirs(out)
+    ranges = [(i, i + 2) for i in range(0, 40, 2)]
+
+    def interrupt(done, total):
+        if done >= 2:
+            raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        split(pdf, ranges, out, on_progress=interrupt)
+    reports = split(pdf, ranges, out)
+
+    skipped = sum(report["skipped"] for report in reports)
+    assert 2 <= skipped < len(ranges)
+    # As partes gravadas antes da interrupção mantêm os nomes, sem cópias
+    assert sorted(name for name in os.listdir(out) if not name.startswith(".")) == sorted(
+        f"Parte_{n}_relatorio.pdf" for n in range(1, len(ranges) + 1)
+    )
+    assert all(page_count(report["path"]) == 2 for report in reports)
+    assert all(report["skipped"] for report in split(pdf, ranges, out))
+
+
+def test_resume_keeps_parts_of_another_pdf_with_the_same_name(tmp_path):
+    pdf_a = make_pdf(str(tmp_path / "a" / "relatorio.pdf"), 3, "A")
+    pdf_b = make_pdf(str(tmp_path / "b" / "relatorio.pdf"), 6, "B")
+    out = str(tmp_path / "saida")
+    os.makedirs(out)
+    ranges_a = [(0, 1), (1, 3)]
+    for report in split(pdf_a, ranges_a, out):
+        os.remove(report["path"])
+    parts_b = {report["path"]: read(report["path"]) for report in split(pdf_b, [(0, 3), (3, 6)], out)}
+
+    reports = split(pdf_a, ranges_a, out)
+
+    # As partes de B ocupam os nomes reservados por A e não são sobrescritas
+    assert all(read(path) == content for path, content in parts_b.items())
+    assert not set(parts_b) & {report["path"] for report in reports}
+    assert [page_count(report["path"]) for report in reports] == [1, 2]
+    # Os novos nomes ficam no diário e são reaproveitados na próxima vez
+    rerun = split(pdf_a, ranges_a, out)
+    assert [report["path"] for report in rerun] == [report["path"] for report in reports]
+    assert all(report["skipped"] for report in rerun)
+
+
+def test_resume_keeps_a_part_edited_after_the_split(tmp_path):
+    pdf = make_pdf(str(tmp_path / "origem" / "relatorio.pdf"), 4, "A")
+    out = str(tmp_path / "saida")
+    os.makedirs(out)
+    ranges = [(0, 2), (2, 4)]
+    first = split(pdf, ranges, out)
+    with open(first[0]["path"], "ab") as f:
+        f.write(b"% anotado pelo usuario\n")
+    edited = read(first[0]["path"])
+
+    reports = split(pdf, ranges, out)
+
+    assert read(first[0]["path"]) == edited
+    assert reports[0]["path"] != first[0]["path"] and not reports[0]["skipped"]
+    assert reports[1]["skipped"]
@@ -0,0 +1,160 @@
+"""Índice com o texto de cada página, extraído uma vez e guardado em disco."""
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+
+from profiling import PROFILER
+from worker_pool import default_pool_size, map_shards
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "cortar", "text")
+
+# Quantidade máxima de documentos mantidos no cache; os mais antigos são
+# descartados
+MAX_CACHED_DOCUMENTS = 200
+
+# Versão do formato gravado; entradas de outra versão são ignoradas
+_FORMAT_VERSION = 1
+
+# Abaixo desta quantidade de páginas, a extração é feita no próprio processo:
+# ela é rápida o bastante para que iniciar o pool não compense
+PARALLEL_MIN_PAGES = 1000
+
+# Quantidade de páginas enviadas de uma vez a cada processo do pool
+SHARD_SIZE = 64
+
+
+def default_text_workers():
+    """Número de processos usados na extração do texto (``CORTAR_TEXT_WORKERS``)."""
+    return default_pool_size("CORTAR_TEXT_WORKERS")
+
+
+def _extract_range(doc, indexes):
+    """Extrai o texto das páginas indicadas, como pares (índice, texto)."""
+    results = []
+    for index in indexes:
+        try:
+            text = doc[index].get_text("text")
+        except Exception as e:
+            print(f"Erro ao extrair o texto da página {index+1}: {e}")
+            text = ""
+        results.append((index, text))
+    return results
+
+
+def extract_texts(document, workers=None, on_progress=None):
+    """Extrai o texto de todas as páginas de ``document`` (um ``PDFDocument``).
+
+    Documentos grandes são divididos em lotes e extraídos em paralelo por um
+    pool de processos. ``on_progress(concluídas, total)`` é chamado a cada
+    lote. Retorna a lista de textos, na ordem das páginas.
+    """
+    total = document.page_count
+    texts = [""] * total
+    workers = default_text_workers() if workers is None else max(1, workers)
+    if total < PARALLEL_MIN_PAGES:
+        workers = 1
+    shards = [range(i, min(i + SHARD_SIZE, total)) for i in range(0, total, SHARD_SIZE)]
+    done = 0
+
+    def store(results):
+        nonlocal done
+        for index, text in results:
+            texts[index] = text
+        done += len(results)
+        if on_progress is not None:
+            on_progress(done, total)
+
+    map_shards(document, _extract_range, shards, workers, store, "extract_text")
+    return texts
+
+
+class TextIndex:
+    """Texto de todas as páginas de um documento, pronto para buscas.
+
+    Use ``TextIndex.load`` para obter o índice: ele é lido do cache em disco
+    quando o mesmo conteúdo já foi indexado antes e, caso contrário, extraído
+    e gravado. Testar vários padrões no mesmo índice não relê o PDF.
+
+    O diretório do cache pode ser definido pela variável de ambiente
+    ``CORTAR_TEXT_CACHE_DIR``.
+    """
+
+    def __init__(self, texts):
+        """Cria o índice a partir dos textos das páginas, em ordem."""
+        self.texts = texts
+
+    def __len__(self):
+        return len(self.texts)
+
+    @classmethod
+    def load(cls, document, cache_dir=None, workers=None, on_progress=None):
+        """Lê o índice de ``document`` do cache ou o constrói."""
+        cache_dir = cache_dir or os.environ.get("CORTAR_TEXT_CACHE_DIR") or DEFAULT_CACHE_DIR
+        with PROFILER.stage("text_fingerprint"):
+            # Calculado uma única vez por documento aberto (e, na aplicação,
+            # memorizado entre execuções pelo cache de miniaturas)
+            fingerprint = document.fingerprint()
+        path = os.path.join(cache_dir, f"{fingerprint}.json.gz")
+        texts = cls._read(path, document.page_count)
+        if texts is None:
+            texts = extract_texts(document, workers=workers, on_progress=on_progress)
+            cls._write(path, texts)
+        elif on_progress is not None:
+            on_progress(document.page_count, document.page_count)
+        return cls(texts)
+
+    def matching_pages(self, pattern):
+        """Índices das páginas cujo texto contém o padrão (expressão regular).
+
+        ``pattern`` pode ser um texto ou uma expressão já compilada; ``^`` e
+        ``$`` valem para cada linha da página.
+        """
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern, re.MULTILINE)
+        with PROFILER.stage("match_text", pages=len(self.texts)):
+            return [index for index, text in enumerate(self.texts) if pattern.search(text)]
+
+    @staticmethod
+    def _read(path, page_count):
+        """Lê uma entrada do cache, ou retorna None se ela não servir."""
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Entrada de cache inválida %s: %s", path, e)
+            return None
+        if data.get("version") != _FORMAT_VERSION or len(data.get("pages", ())) != page_count:
+            return None
+        os.utime(path)  # Registra o acesso para o descarte dos mais antigos
+        return data["pages"]
+
+    @staticmethod
+    def _write(path, texts):
+        """Grava uma entrada de forma atômica e descarta as mais antigas."""
+        cache_dir = os.path.dirname(path)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump({"version": _FORMAT_VERSION, "pages": texts}, f)
+            os.replace(tmp_path, path)
+            entries = sorted(
+                (entry.stat().st_mtime, entry.path)
+                for entry in os.scandir(cache_dir)
+                if entry.name.endswith(".json.gz")
+            )
+        except OSError as e:
+            logger.warning("Não foi possível gravar no cache %s: %s", path, e)
+            return
+        for _, old_path in entries[:-MAX_CACHED_DOCUMENTS]:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
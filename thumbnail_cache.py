@@ -0,0 +1,193 @@
+"""Cache persistente de thumbnails em disco, com descarte LRU."""
+import json
+import logging
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+from document import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "cortar", "thumbnails")
+DEFAULT_MAX_MB = 512
+
+# Cabeçalho de cada entrada: largura e altura da imagem, seguidos dos pixels RGB
+_HEADER = struct.Struct(">II")
+_ENTRY_EXT = ".rgb"
+
+
+class ThumbnailCache:
+    """Armazena thumbnails renderizados em disco entre as execuções.
+
+    Cada entrada é identificada pelo hash do conteúdo do PDF, pelo índice da
+    página e pela escala de renderização. Quando o tamanho total ultrapassa o
+    limite configurado, as entradas usadas há mais tempo são removidas.
+
+    O diretório e o limite podem ser definidos pelas variáveis de ambiente
+    ``CORTAR_CACHE_DIR`` e ``CORTAR_CACHE_MB``.
+    """
+
+    def __init__(self, cache_dir=None, max_mb=None):
+        """Prepara o diretório do cache e indexa as entradas existentes."""
+        self.cache_dir = cache_dir or os.environ.get("CORTAR_CACHE_DIR") or DEFAULT_CACHE_DIR
+        if max_mb is None:
+            max_mb = float(os.environ.get("CORTAR_CACHE_MB", DEFAULT_MAX_MB))
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # caminho -> tamanho, do menos ao mais recente
+        self._total_bytes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._scan()
+        self._fingerprints_path = os.path.join(self.cache_dir, "fingerprints.json")
+        self._fingerprints = self._load_fingerprints()
+
+    @property
+    def total_bytes(self):
+        """Tamanho total ocupado pelas entradas do cache."""
+        return self._total_bytes
+
+    def fingerprint(self, pdf_path):
+        """Retorna o hash do conteúdo do PDF.
+
+        O hash é memorizado por caminho, tamanho e data de modificação, para
+        que reabrir um documento conhecido não exija lê-lo inteiro novamente.
+        """
+        key = self._fingerprint_key(pdf_path)
+        with self._lock:
+            fp = self._fingerprints.get(key)
+        if fp is not None:
+            return fp
+        fp = file_fingerprint(pdf_path)
+        with self._lock:
+            self._fingerprints[key] = fp
+            self._save_fingerprints()
+        return fp
+
+    def known_fingerprint(self, pdf_path):
+        """Retorna o hash memorizado do PDF, ou None se for preciso calculá-lo.
+
+        Custa apenas uma consulta ao sistema de arquivos, sem ler o PDF.
+        """
+        try:
+            key = self._fingerprint_key(pdf_path)
+        except OSError:
+            return None
+        with self._lock:
+            return self._fingerprints.get(key)
+
+    def record_miss(self):
+        """Conta como ausente uma página que não pôde nem ser procurada no cache."""
+        with self._lock:
+            self.misses += 1
+
+    def get(self, fingerprint, index, scale):
+        """Retorna o thumbnail em cache, ou None se ele não existir."""
+        path = self._entry_path(fingerprint, index, scale)
+        with self._lock:
+            if path not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            width, height = _HEADER.unpack_from(data)
+            img = Image.frombytes("RGB", (width, height), data[_HEADER.size:])
+            os.utime(path)  # Registra o acesso para o descarte LRU
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning("Entrada de cache inválida %s: %s", path, e)
+            with self._lock:
+                self._discard(path)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return img
+
+    def put(self, fingerprint, index, scale, img):
+        """Grava o thumbnail no cache e descarta entradas antigas se preciso."""
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        path = self._entry_path(fingerprint, index, scale)
+        data = _HEADER.pack(*img.size) + img.tobytes()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Não foi possível gravar no cache %s: %s", path, e)
+            return
+        with self._lock:
+            self._total_bytes -= self._entries.pop(path, 0)
+            self._entries[path] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    @staticmethod
+    def _fingerprint_key(pdf_path):
+        """Chave de memorização do hash: caminho, tamanho e data de modificação."""
+        stat = os.stat(pdf_path)
+        return f"{os.path.abspath(pdf_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    def _entry_path(self, fingerprint, index, scale):
+        """Caminho do arquivo de uma entrada."""
+        return os.path.join(self.cache_dir, fingerprint, f"{index}_{scale:.4f}{_ENTRY_EXT}")
+
+    def _scan(self):
+        """Indexa as entradas já gravadas, da menos à mais recentemente usada."""
+        found = []
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for name in filenames:
+                if not name.endswith(_ENTRY_EXT):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, path, stat.st_size))
+        found.sort()
+        for _, path, size in found:
+            self._entries[path] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        """Remove as entradas menos usadas até respeitar o limite de tamanho."""
+        while self._total_bytes > self.max_bytes and self._entries:
+            path, _ = next(iter(self._entries.items()))
+            self._discard(path)
+
+    def _discard(self, path):
+        """Remove uma entrada do índice e do disco."""
+        self._total_bytes -= self._entries.pop(path, 0)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _load_fingerprints(self):
+        """Lê os hashes memorizados de execuções anteriores."""
+        try:
+            with open(self._fingerprints_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_fingerprints(self):
+        """Grava os hashes memorizados de forma atômica."""
+        tmp_path = self._fingerprints_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._fingerprints, f)
+            os.replace(tmp_path, self._fingerprints_path)
+        except OSError as e:
+            logger.warning("Não foi possível gravar %s: %s", self._fingerprints_path, e)
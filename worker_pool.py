@@ -0,0 +1,105 @@
+"""Pools de processos usados para trabalhar em paralelo sobre um PDF.
+
+Renderização, divisão, análise das páginas e extração de texto seguem o
+mesmo esquema: um pool de processos em que cada processo abre o documento
+uma única vez (ver ``document_pool``) e recebe lotes de páginas (ver
+``map_shards``).
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fitz  # PyMuPDF
+
+from profiling import PROFILER
+
+# Documento aberto por cada processo de um document_pool
+_worker_doc = None
+
+
+def default_pool_size(env_var, reserve=0):
+    """Número padrão de processos de um pool.
+
+    É o valor da variável de ambiente ``env_var``, se definida (1 ou 0 fazem
+    o trabalho no próprio processo), ou o número de núcleos menos
+    ``reserve``, até 8.
+    """
+    env = os.environ.get(env_var)
+    if env:
+        return max(1, int(env))
+    return max(1, min(8, (os.cpu_count() or 1) - reserve))
+
+
+def process_pool(workers, initializer=None, initargs=()):
+    """Cria um pool de ``workers`` processos.
+
+    Os processos são criados com "spawn": duplicar, via fork, um processo que
+    já possui threads (e, na aplicação, a interface Tk) pode travá-los.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+        initargs=initargs,
+    )
+
+
+def _open_worker_document(pdf_path):
+    """Abre o documento uma única vez em cada processo do pool."""
+    global _worker_doc
+    _worker_doc = fitz.open(pdf_path)
+
+
+def document_pool(pdf_path, workers):
+    """Cria um pool em que cada processo mantém ``pdf_path`` aberto."""
+    return process_pool(workers, _open_worker_document, (pdf_path,))
+
+
+def _apply_to_worker_document(func, shard):
+    """Executa ``func`` sobre o documento do processo do pool."""
+    return func(_worker_doc, shard)
+
+
+def submit_shard(pool, func, shard):
+    """Enfileira ``func(documento, shard)`` em um ``document_pool``.
+
+    ``func`` é chamada no processo do pool com o documento PyMuPDF aberto
+    por ele; por isso, deve ser uma função de módulo (ou um
+    ``functools.partial`` dela).
+    """
+    return pool.submit(_apply_to_worker_document, func, shard)
+
+
+def map_shards(document, func, shards, workers, on_result, stage):
+    """Aplica ``func(documento, lote)`` a cada lote de páginas de ``document``.
+
+    ``document`` é um ``PDFDocument``. Com ``workers`` igual a 1, os lotes são
+    processados neste processo, com o documento bloqueado; senão, por um
+    ``document_pool``, cada processo com sua própria cópia do documento.
+    ``on_result(resultado)`` é chamado neste processo para cada lote, na
+    ordem em que forem concluídos. Se um lote falhar, os que ainda não
+    começaram são cancelados e o erro é lançado.
+
+    Cada lote é medido como a etapa ``stage`` do profiler; o conjunto, no
+    modo paralelo, como ``{stage}_parallel``.
+    """
+    if not shards:
+        return
+    if workers <= 1:
+        for shard in shards:
+            with PROFILER.stage(stage, first_page=shard[0]), document.lock:
+                result = func(document.doc, shard)
+            on_result(result)
+        return
+
+    pool = document_pool(document.path, min(workers, len(shards)))
+    with PROFILER.stage(f"{stage}_parallel", shards=len(shards), workers=workers), pool:
+        futures = [submit_shard(pool, func, shard) for shard in shards]
+        try:
+            for future in as_completed(futures):
+                on_result(future.result())
+        except BaseException:
+            # Não espera pelos lotes restantes se um deles falhar
+            for future in futures:
+                future.cancel()
+            raise